@@ -0,0 +1,263 @@
+"""Benchmark representative agent graphs built with `create_react_agent`.
+
+Runs each scenario with a deterministic fake chat model and fake tools, so the
+numbers only reflect LangGraph overhead: task scheduling, channel updates and
+checkpointing. Pass `--profile` to also print where time goes per superstep
+phase, as recorded by `PregelProfiler`.
+
+Usage:
+    python bench/agent_graphs.py
+    python bench/agent_graphs.py --runs 50 --save baseline.json
+    python bench/agent_graphs.py --compare baseline.json --threshold 0.15
+
+With `--compare`, exits with status 1 if the median time of any scenario
+regressed by more than `--threshold` (relative) against the saved baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import statistics
+import sys
+import time
+import warnings
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.prebuilt import create_react_agent
+from langgraph.pregel.profiler import PregelProfiler
+
+
+class FakeToolCallingModel(BaseChatModel):
+    """Calls `tools_per_turn` tools per turn for `turns` turns, then answers."""
+
+    turns: int = 1
+    tools_per_turn: int = 1
+    tool_names: list[str] = ["lookup"]
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> FakeToolCallingModel:
+        return self
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # count turns since the last human message
+        turn = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                turn += 1
+        if turn >= self.turns:
+            message = AIMessage(content="Here is the summary. " * 20)
+        else:
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": self.tool_names[i % len(self.tool_names)],
+                        "args": {"query": f"item-{turn}-{i}"},
+                        "id": f"call-{turn}-{i}",
+                    }
+                    for i in range(self.tools_per_turn)
+                ],
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look up a product."""
+    return f"Product {query}: " + "in stock, ships tomorrow. " * 10
+
+
+@tool
+def price(query: str) -> dict[str, Any]:
+    """Check the price of a product."""
+    return {"query": query, "price": 9.99, "currency": "EUR"}
+
+
+@tool
+def inventory(query: str) -> str:
+    """Check the inventory of a product."""
+    return f"{query}: 42 units"
+
+
+TOOLS = [lookup, price, inventory]
+
+
+def _scenarios() -> dict[str, tuple[FakeToolCallingModel, bool]]:
+    """Scenario name -> (model, whether to reuse one thread for all runs)."""
+    names = [t.name for t in TOOLS]
+    return {
+        "single_tool": (FakeToolCallingModel(turns=1, tools_per_turn=1), False),
+        "multi_turn": (FakeToolCallingModel(turns=5, tools_per_turn=1), False),
+        "parallel_tools": (
+            FakeToolCallingModel(turns=2, tools_per_turn=8, tool_names=names),
+            False,
+        ),
+        # a growing thread, to catch regressions in checkpoint size and
+        # serialization of long message histories
+        "long_thread": (
+            FakeToolCallingModel(turns=2, tools_per_turn=2, tool_names=names),
+            True,
+        ),
+    }
+
+
+def _run_scenario(
+    name: str,
+    model: FakeToolCallingModel,
+    same_thread: bool,
+    runs: int,
+    use_async: bool,
+    checkpointer: bool,
+    profiler: PregelProfiler | None,
+) -> list[float]:
+    with warnings.catch_warnings():
+        # create_react_agent is deprecated in favor of langchain's create_agent,
+        # but is still the reference graph for LangGraph's own overhead
+        warnings.simplefilter("ignore")
+        agent = create_react_agent(
+            model, TOOLS, checkpointer=InMemorySaver() if checkpointer else None
+        )
+
+    def inputs() -> dict[str, Any]:
+        # a fresh message per run, since add_messages assigns an id to the one it
+        # is given and would then replace it instead of appending to the thread
+        return {"messages": [HumanMessage("Find me a lamp under 50 EUR.")]}
+
+    def config(i: int) -> dict[str, Any]:
+        thread_id = name if same_thread else f"{name}-{i}"
+        return {"configurable": {"thread_id": thread_id}}
+
+    timings: list[float] = []
+    if use_async:
+
+        async def arun() -> None:
+            for i in range(runs):
+                start = time.perf_counter()
+                await agent.ainvoke(inputs(), config(i), profiler=profiler)
+                timings.append(time.perf_counter() - start)
+
+        asyncio.run(arun())
+    else:
+        for i in range(runs):
+            start = time.perf_counter()
+            agent.invoke(inputs(), config(i), profiler=profiler)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summarize(timings: list[float]) -> dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "median_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3,
+        "min_ms": ordered[0] * 1e3,
+    }
+
+
+def _print_profile(profiler: PregelProfiler) -> None:
+    totals: dict[str, float] = {
+        "prepare": 0.0,
+        "tasks": 0.0,
+        "apply_writes": 0.0,
+        "checkpoint": 0.0,
+        "serialization": 0.0,
+    }
+    nbytes = 0
+    for step in profiler.steps:
+        totals["prepare"] += step.prepare_time
+        totals["tasks"] += sum(t.duration for t in step.tasks)
+        totals["apply_writes"] += step.apply_writes_time
+        totals["checkpoint"] += step.checkpoint_time
+        totals["serialization"] += step.serialization_time
+        nbytes += step.checkpoint_bytes
+    steps = max(len(profiler.steps), 1)
+    print(
+        "    per step: "
+        + ", ".join(f"{k} {v / steps * 1e6:.0f}us" for k, v in totals.items())
+        + f", checkpoint {nbytes / steps:.0f} bytes"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument(
+        "--scenarios", nargs="+", default=None, help="Scenarios to run (default all)"
+    )
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--no-checkpointer", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--save", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    scenarios = _scenarios()
+    selected = args.scenarios or list(scenarios)
+    results: dict[str, dict[str, float]] = {}
+    print(f"{'scenario':>16} {'median ms':>10} {'p95 ms':>8} {'min ms':>8}")
+    for name in selected:
+        model, same_thread = scenarios[name]
+        run = functools.partial(
+            _run_scenario,
+            name,
+            model,
+            same_thread,
+            use_async=args.use_async,
+            checkpointer=not args.no_checkpointer,
+        )
+        run(args.warmup, profiler=None)
+        results[name] = summary = _summarize(run(args.runs, profiler=None))
+        print(
+            f"{name:>16} {summary['median_ms']:>10.2f} "
+            f"{summary['p95_ms']:>8.2f} {summary['min_ms']:>8.2f}"
+        )
+        if args.profile:
+            profiler = PregelProfiler(max_steps=None)
+            run(args.runs, profiler=profiler)
+            _print_profile(profiler)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline: dict[str, dict[str, float]] = json.load(f)
+        regressed = False
+        for name, summary in results.items():
+            if name not in baseline:
+                continue
+            change = summary["median_ms"] / baseline[name]["median_ms"] - 1
+            flag = "REGRESSION" if change > args.threshold else ""
+            regressed = regressed or bool(flag)
+            print(f"{name:>16} {change:>+8.1%} {flag}")
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
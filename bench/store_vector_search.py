@@ -0,0 +1,83 @@
+"""Benchmark `InMemoryStore` vector search: `"flat"` vs `"matrix"` index.
+
+Usage:
+    python bench/store_vector_search.py
+    python bench/store_vector_search.py --sizes 10000 100000 --dims 128
+
+Note that the `"flat"` layout keeps every embedding as a Python list, so the
+1M-item run needs several GB of RAM at the default dimensionality.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+NAMESPACES = 8
+BATCH = 10_000
+
+
+def _make_store(mode: str, dims: int, seed: int) -> InMemoryStore:
+    rng = np.random.default_rng(seed)
+
+    def embed(texts: list[str]) -> list[list[float]]:
+        return rng.standard_normal((len(texts), dims), dtype=np.float32).tolist()
+
+    return InMemoryStore(
+        index={"dims": dims, "embed": embed, "fields": ["text"], "vector_index": mode}
+    )
+
+
+def _populate(store: InMemoryStore, size: int) -> float:
+    start = time.perf_counter()
+    for lo in range(0, size, BATCH):
+        store.batch(
+            [
+                PutOp(
+                    namespace=("catalog", f"shard-{i % NAMESPACES}"),
+                    key=f"sku-{i}",
+                    value={"text": f"product {i}", "price": i % 100},
+                )
+                for i in range(lo, min(lo + BATCH, size))
+            ]
+        )
+    return time.perf_counter() - start
+
+
+def _time_search(store: InMemoryStore, queries: int, **kwargs: object) -> float:
+    start = time.perf_counter()
+    for i in range(queries):
+        store.search(("catalog",), query=f"query {i}", limit=10, **kwargs)  # type: ignore[arg-type]
+    return (time.perf_counter() - start) / queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dims", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'mode':>7} {'load s':>8} {'query ms':>9} {'filtered ms':>12}")
+    for size in args.sizes:
+        for mode in ("flat", "matrix"):
+            store = _make_store(mode, args.dims, seed=size)
+            load = _populate(store, size)
+            plain = _time_search(store, args.queries)
+            filtered = _time_search(store, args.queries, filter={"price": 7})
+            print(
+                f"{size:>10} {mode:>7} {load:>8.2f} "
+                f"{plain * 1e3:>9.2f} {filtered * 1e3:>12.2f}"
+            )
+            del store
+
+
+if __name__ == "__main__":
+    main()
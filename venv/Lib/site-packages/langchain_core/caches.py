@@ -0,0 +1,627 @@
+"""Optional caching layer for language models.
+
+Distinct from provider-based [prompt caching](https://docs.langchain.com/oss/python/langchain/models#prompt-caching).
+
+!!! warning "Beta feature"
+    This is a beta feature. Please be wary of deploying experimental code to production
+    unless you've taken appropriate precautions.
+
+A cache is useful for two reasons:
+
+1. It can save you money by reducing the number of API calls you make to the LLM
+    provider if you're often requesting the same completion multiple times.
+2. It can speed up your application by reducing the number of API calls you make to the
+    LLM provider.
+"""
+
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from typing_extensions import TypedDict, override
+
+from langchain_core.outputs import Generation
+from langchain_core.runnables import run_in_executor
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from langchain_core.embeddings import Embeddings
+
+RETURN_VAL_TYPE = Sequence[Generation]
+
+
+class BaseCache(ABC):
+    """Interface for a caching layer for LLMs and Chat models.
+
+    The cache interface consists of the following methods:
+
+    - lookup: Look up a value based on a prompt and `llm_string`.
+    - update: Update the cache based on a prompt and `llm_string`.
+    - clear: Clear the cache.
+
+    In addition, the cache interface provides an async version of each method.
+
+    The default implementation of the async methods is to run the synchronous
+    method in an executor. It's recommended to override the async methods
+    and provide async implementations to avoid unnecessary overhead.
+    """
+
+    @abstractmethod
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Look up based on `prompt` and `llm_string`.
+
+        A cache implementation is expected to generate a key from the 2-tuple
+        of `prompt` and `llm_string` (e.g., by concatenating them with a delimiter).
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+                This is used to capture the invocation parameters of the LLM
+                (e.g., model name, temperature, stop tokens, max tokens, etc.).
+
+                These invocation parameters are serialized into a string representation.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+            The cached value is a list of `Generation` (or subclasses).
+        """
+
+    @abstractmethod
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Update cache based on `prompt` and `llm_string`.
+
+        The prompt and llm_string are used to generate a key for the cache.
+        The key should match that of the lookup method.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+                This is used to capture the invocation parameters of the LLM
+                (e.g., model name, temperature, stop tokens, max tokens, etc.).
+
+                These invocation parameters are serialized into a string
+                representation.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+
+    @abstractmethod
+    def clear(self, **kwargs: Any) -> None:
+        """Clear cache that can take additional keyword arguments."""
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Async look up based on `prompt` and `llm_string`.
+
+        A cache implementation is expected to generate a key from the 2-tuple
+        of `prompt` and `llm_string` (e.g., by concatenating them with a delimiter).
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+                This is used to capture the invocation parameters of the LLM
+                (e.g., model name, temperature, stop tokens, max tokens, etc.).
+
+                These invocation parameters are serialized into a string
+                representation.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+            The cached value is a list of `Generation` (or subclasses).
+        """
+        return await run_in_executor(None, self.lookup, prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        """Async update cache based on `prompt` and `llm_string`.
+
+        The prompt and llm_string are used to generate a key for the cache.
+        The key should match that of the look up method.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+                This is used to capture the invocation parameters of the LLM
+                (e.g., model name, temperature, stop tokens, max tokens, etc.).
+
+                These invocation parameters are serialized into a string
+                representation.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+        return await run_in_executor(None, self.update, prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        """Async clear cache that can take additional keyword arguments."""
+        return await run_in_executor(None, self.clear, **kwargs)
+
+
+class InMemoryCache(BaseCache):
+    """Cache that stores things in memory."""
+
+    def __init__(self, *, maxsize: int | None = None) -> None:
+        """Initialize with empty cache.
+
+        Args:
+            maxsize: The maximum number of items to store in the cache.
+                If `None`, the cache has no maximum size.
+                If the cache exceeds the maximum size, the least recently used
+                items are removed.
+
+        Raises:
+            ValueError: If `maxsize` is less than or equal to `0`.
+        """
+        self._cache: OrderedDict[tuple[str, str], RETURN_VAL_TYPE] = OrderedDict()
+        if maxsize is not None and maxsize <= 0:
+            msg = "maxsize must be greater than 0"
+            raise ValueError(msg)
+        self._maxsize = maxsize
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Look up based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+        """
+        key = (prompt, llm_string)
+        if (value := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Update cache based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+        key = (prompt, llm_string)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+        elif self._maxsize is not None and len(self._cache) == self._maxsize:
+            self._cache.popitem(last=False)
+        self._cache[key] = return_val
+
+    @override
+    def clear(self, **kwargs: Any) -> None:
+        """Clear cache."""
+        self._cache = OrderedDict()
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Async look up based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+        """
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        """Async update cache based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+        self.update(prompt, llm_string, return_val)
+
+    @override
+    async def aclear(self, **kwargs: Any) -> None:
+        """Async clear cache."""
+        self.clear()
+
+
+class CacheStats(TypedDict):
+    """Usage statistics reported by `InMemorySemanticCache.stats`."""
+
+    hits: int
+    """Lookups answered from the cache, exact or by similarity."""
+    similarity_hits: int
+    """Lookups answered by embedding similarity rather than an exact key match."""
+    misses: int
+    """Lookups not answered from the cache."""
+    evictions: int
+    """Entries removed to stay within `maxsize` or `max_bytes`."""
+    entries: int
+    """Number of entries currently in the cache."""
+    bytes: int
+    """Estimated size of the cached entries, in bytes."""
+    hit_rate: float
+    """`hits / (hits + misses)`, or `0.0` before the first lookup."""
+
+
+class InMemorySemanticCache(BaseCache):
+    """In-memory LRU cache that can match prompts by embedding similarity.
+
+    Lookups first try an exact match on the (optionally normalized) prompt. If that
+    misses and `embedding` is set, the prompt is embedded and compared against the
+    cached prompts for the same `llm_string`; the most similar one is returned if
+    its cosine similarity is at least `score_threshold`.
+
+    For chat models the prompt is a serialized list of messages, so consider a
+    `normalizer` that extracts the text that should be compared.
+
+    Entries are evicted in least recently used order once `maxsize` entries or
+    `max_bytes` of estimated prompt and generation text are exceeded.
+
+    Example:
+        ```python
+        from langchain_core.caches import InMemorySemanticCache
+        from langchain_core.globals import set_llm_cache
+        from langchain_openai import OpenAIEmbeddings
+
+        set_llm_cache(
+            InMemorySemanticCache(
+                embedding=OpenAIEmbeddings(),
+                score_threshold=0.95,
+                maxsize=10_000,
+            )
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        embedding: Embeddings | None = None,
+        score_threshold: float = 0.95,
+        normalizer: Callable[[str], str] | None = None,
+        maxsize: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Initialize with empty cache.
+
+        Args:
+            embedding: Embeddings used to match prompts by similarity.
+                If `None`, only exact (normalized) matches are returned.
+            score_threshold: Minimum cosine similarity for a similarity match.
+            normalizer: Function applied to prompts before they are used as keys,
+                e.g. to lowercase them or collapse whitespace.
+            maxsize: The maximum number of items to store in the cache.
+                If `None`, the cache has no maximum size.
+            max_bytes: The maximum estimated size of the cached items, in bytes.
+                If `None`, the cache has no maximum size.
+
+        Raises:
+            ValueError: If `maxsize` or `max_bytes` is less than or equal to `0`.
+            ImportError: If `embedding` is set and numpy is not installed.
+        """
+        if maxsize is not None and maxsize <= 0:
+            msg = "maxsize must be greater than 0"
+            raise ValueError(msg)
+        if max_bytes is not None and max_bytes <= 0:
+            msg = "max_bytes must be greater than 0"
+            raise ValueError(msg)
+        if embedding is not None:
+            try:
+                import numpy as np  # noqa: F401
+            except ImportError as e:
+                msg = (
+                    "Similarity lookups require numpy to be installed. "
+                    "Please install numpy with `pip install numpy`."
+                )
+                raise ImportError(msg) from e
+        self.embedding = embedding
+        self.score_threshold = score_threshold
+        self.normalizer = normalizer
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, str], tuple[RETURN_VAL_TYPE, int]] = (
+            OrderedDict()
+        )
+        self._indexes: dict[str, _EmbeddingIndex] = {}
+        # embeddings computed by a missed lookup, reused by the following update
+        self._recent_embeddings: OrderedDict[str, list[float]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._similarity_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _key(self, prompt: str) -> str:
+        return self.normalizer(prompt) if self.normalizer else prompt
+
+    def _lookup_exact(self, key: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        with self._lock:
+            if (entry := self._cache.get((key, llm_string))) is None:
+                return None
+            self._cache.move_to_end((key, llm_string))
+            self._hits += 1
+            return entry[0]
+
+    def _lookup_similar(
+        self, key: str, llm_string: str, vector: list[float]
+    ) -> RETURN_VAL_TYPE | None:
+        with self._lock:
+            self._remember_embedding(key, vector)
+            index = self._indexes.get(llm_string)
+            match = index.most_similar(vector) if index is not None else None
+            if match is not None and match[1] >= self.score_threshold:
+                self._cache.move_to_end((match[0], llm_string))
+                self._hits += 1
+                self._similarity_hits += 1
+                return self._cache[match[0], llm_string][0]
+            self._misses += 1
+            return None
+
+    def _remember_embedding(self, key: str, vector: list[float]) -> None:
+        self._recent_embeddings[key] = vector
+        if len(self._recent_embeddings) > _RECENT_EMBEDDINGS_SIZE:
+            self._recent_embeddings.popitem(last=False)
+
+    def _miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+
+    def _needs_embedding(self, key: str, llm_string: str) -> bool:
+        return self.embedding is not None and (key, llm_string) not in self._cache
+
+    def _store(
+        self,
+        key: str,
+        llm_string: str,
+        return_val: RETURN_VAL_TYPE,
+        vector: list[float] | None,
+    ) -> None:
+        size = _estimate_size(key, llm_string, return_val)
+        with self._lock:
+            if vector is None:
+                vector = self._recent_embeddings.pop(key, None)
+            if (old := self._cache.pop((key, llm_string), None)) is not None:
+                # an overwritten prompt keeps its row in the embedding index
+                self._bytes -= old[1]
+            self._cache[key, llm_string] = (return_val, size)
+            self._bytes += size
+            if self.embedding is not None and vector is not None:
+                if (index := self._indexes.get(llm_string)) is None:
+                    index = self._indexes[llm_string] = _EmbeddingIndex(len(vector))
+                index.add(key, vector)
+            while (self._maxsize is not None and len(self._cache) > self._maxsize) or (
+                self._max_bytes is not None
+                and self._bytes > self._max_bytes
+                and len(self._cache) > 1
+            ):
+                self._remove(next(iter(self._cache)))
+                self._evictions += 1
+
+    def _remove(self, cache_key: tuple[str, str]) -> None:
+        _, size = self._cache.pop(cache_key)
+        self._bytes -= size
+        key, llm_string = cache_key
+        if (index := self._indexes.get(llm_string)) is not None:
+            index.remove(key)
+            if not index.keys:
+                del self._indexes[llm_string]
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Look up based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+        """
+        key = self._key(prompt)
+        if (value := self._lookup_exact(key, llm_string)) is not None:
+            return value
+        if self.embedding is None:
+            self._miss()
+            return None
+        vector = self.embedding.embed_query(key)
+        return self._lookup_similar(key, llm_string, vector)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Update cache based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+        key = self._key(prompt)
+        vector = None
+        if self._needs_embedding(key, llm_string) and (
+            key not in self._recent_embeddings
+        ):
+            vector = self.embedding.embed_query(key)  # type: ignore[union-attr]
+        self._store(key, llm_string, return_val, vector)
+
+    @override
+    def clear(self, **kwargs: Any) -> None:
+        """Clear cache. Statistics are kept."""
+        with self._lock:
+            self._cache = OrderedDict()
+            self._indexes = {}
+            self._recent_embeddings = OrderedDict()
+            self._bytes = 0
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Async look up based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+
+        Returns:
+            On a cache miss, return `None`. On a cache hit, return the cached value.
+        """
+        key = self._key(prompt)
+        if (value := self._lookup_exact(key, llm_string)) is not None:
+            return value
+        if self.embedding is None:
+            self._miss()
+            return None
+        vector = await self.embedding.aembed_query(key)
+        return self._lookup_similar(key, llm_string, vector)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        """Async update cache based on `prompt` and `llm_string`.
+
+        Args:
+            prompt: A string representation of the prompt.
+                In the case of a chat model, the prompt is a non-trivial
+                serialization of the prompt into the language model.
+            llm_string: A string representation of the LLM configuration.
+            return_val: The value to be cached. The value is a list of `Generation`
+                (or subclasses).
+        """
+        key = self._key(prompt)
+        vector = None
+        if self._needs_embedding(key, llm_string) and (
+            key not in self._recent_embeddings
+        ):
+            vector = await self.embedding.aembed_query(key)  # type: ignore[union-attr]
+        self._store(key, llm_string, return_val, vector)
+
+    @override
+    async def aclear(self, **kwargs: Any) -> None:
+        """Async clear cache. Statistics are kept."""
+        self.clear()
+
+    def stats(self) -> CacheStats:
+        """Return hit, miss and eviction counts and the current cache size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return CacheStats(
+                hits=self._hits,
+                similarity_hits=self._similarity_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._cache),
+                bytes=self._bytes,
+                hit_rate=self._hits / lookups if lookups else 0.0,
+            )
+
+
+_RECENT_EMBEDDINGS_SIZE = 128
+
+
+class _EmbeddingIndex:
+    """Contiguous matrix of prompt embeddings for one `llm_string`.
+
+    Removed rows are replaced by the last row, so the live region is always
+    `[:len(keys)]`.
+    """
+
+    def __init__(self, dims: int) -> None:
+        import numpy as np
+
+        self.matrix: np.ndarray = np.empty((16, dims), dtype=np.float32)
+        self.keys: list[str] = []
+        self.rows: dict[str, int] = {}
+
+    def _as_row(self, vector: list[float]) -> np.ndarray:
+        import numpy as np
+
+        row = np.asarray(vector, dtype=np.float32)
+        if row.shape != self.matrix.shape[1:]:
+            msg = (
+                f"Embedding has {len(vector)} dimensions, but the embeddings cached "
+                f"for this llm_string have {self.matrix.shape[1]}."
+            )
+            raise ValueError(msg)
+        return row
+
+    def add(self, key: str, vector: list[float]) -> None:
+        import numpy as np
+
+        values = self._as_row(vector)
+        if (row := self.rows.get(key)) is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            if row == len(self.matrix):
+                self.matrix = np.concatenate([self.matrix, np.empty_like(self.matrix)])
+        self.matrix[row] = values
+
+    def remove(self, key: str) -> None:
+        if (row := self.rows.pop(key, None)) is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self.matrix[row] = self.matrix[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+        self.keys.pop()
+
+    def most_similar(self, vector: list[float]) -> tuple[str, float] | None:
+        """Return the key with the highest cosine similarity to `vector`.
+
+        Raises:
+            ValueError: If `vector` has a different number of dimensions than the
+                cached embeddings.
+        """
+        import numpy as np
+
+        if not self.keys:
+            return None
+        query = self._as_row(vector)
+        matrix = self.matrix[: len(self.keys)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (matrix @ query) / (
+                np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+            )
+        # zero or NaN vectors have no direction, so they match nothing
+        scores[~np.isfinite(scores)] = -np.inf
+        best = int(scores.argmax())
+        if scores[best] == -np.inf:
+            return None
+        return self.keys[best], float(scores[best])
+
+
+def _estimate_size(prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> int:
+    return (
+        len(prompt.encode())
+        + len(llm_string.encode())
+        + sum(len(generation.text.encode()) for generation in return_val)
+    )
@@ -0,0 +1,405 @@
+"""Interface for a rate limiter and an in-memory rate limiter."""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+
+class BaseRateLimiter(abc.ABC):
+    """Base class for rate limiters.
+
+    Usage of the base limiter is through the acquire and aacquire methods depending
+    on whether running in a sync or async context.
+
+    Implementations are free to add a timeout parameter to their initialize method
+    to allow users to specify a timeout for acquiring the necessary tokens when
+    using a blocking call.
+
+    Current limitations:
+
+    - Rate limiting information is not surfaced in tracing or callbacks. This means
+        that the total time it takes to invoke a chat model will encompass both
+        the time spent waiting for tokens and the time spent making the request.
+    """
+
+    @abc.abstractmethod
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Attempt to acquire the necessary tokens for the rate limiter.
+
+        This method blocks until the required tokens are available if `blocking`
+        is set to `True`.
+
+        If `blocking` is set to `False`, the method will immediately return the result
+        of the attempt to acquire the tokens.
+
+        Args:
+            blocking: If `True`, the method will block until the tokens are available.
+                If `False`, the method will return immediately with the result of
+                the attempt.
+
+        Returns:
+            `True` if the tokens were successfully acquired, `False` otherwise.
+        """
+
+    @abc.abstractmethod
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Attempt to acquire the necessary tokens for the rate limiter.
+
+        This method blocks until the required tokens are available if `blocking`
+        is set to `True`.
+
+        If `blocking` is set to `False`, the method will immediately return the result
+        of the attempt to acquire the tokens.
+
+        Args:
+            blocking: If `True`, the method will block until the tokens are available.
+                If `False`, the method will return immediately with the result of
+                the attempt.
+
+        Returns:
+            `True` if the tokens were successfully acquired, `False` otherwise.
+        """
+
+
+class _Bucket:
+    """Token bucket state for a single key."""
+
+    __slots__ = ("last", "lock", "tokens")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Tokens in the bucket as of `last`. Negative while callers are waiting
+        # for tokens that they have already reserved.
+        self.tokens = 0.0
+        # The last time tokens were consumed, `None` until the first attempt.
+        self.last: float | None = None
+
+
+class InMemoryRateLimiter(BaseRateLimiter):
+    """An in memory rate limiter based on a token bucket algorithm.
+
+    This is an in memory rate limiter, so it cannot rate limit across
+    different processes.
+
+    It is thread safe and can be used in either a sync or async context.
+
+    The in memory rate limiter is based on a token bucket. The bucket is filled
+    with tokens at a given rate. Each request consumes a token, or `weight`
+    tokens. If there are not enough tokens in the bucket, the request is blocked
+    until there are enough tokens.
+
+    Rather than polling the bucket, a blocking request reserves its tokens right
+    away and then sleeps for exactly as long as it takes to refill them. Waiters
+    are therefore served in arrival order, sync and async callers alike, and a
+    non-blocking request never takes tokens that a waiter has reserved.
+
+    By default tokens have nothing to do with LLM tokens, they are just a way to
+    keep track of how many requests can be made at a given time. Pass `weight`
+    to `acquire` to rate limit by a cost instead, e.g. an estimate of the LLM
+    tokens used by the request.
+
+    Requests can be rate limited separately by passing a `key`, e.g. a model
+    name or an end user id. Each key gets its own bucket with the same rate and
+    size. Use `for_key` to get a rate limiter for a single key that can be passed
+    to a chat model, or `key_func` to derive the key from the current context.
+
+    Current limitations:
+
+    - The rate limiter is not designed to work across different processes. It is
+        an in-memory rate limiter, but it is thread safe.
+
+    Example:
+        ```python
+        import time
+
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+
+        rate_limiter = InMemoryRateLimiter(
+            requests_per_second=0.1,  # <-- Can only make a request once every 10 seconds!!
+            max_bucket_size=10,  # Controls the maximum burst size.
+        )
+
+        from langchain_anthropic import ChatAnthropic
+
+        model = ChatAnthropic(
+            model_name="claude-sonnet-4-5-20250929", rate_limiter=rate_limiter
+        )
+
+        for _ in range(5):
+            tic = time.time()
+            model.invoke("hello")
+            toc = time.time()
+            print(toc - tic)
+        ```
+
+        Separate buckets per model, sharing one rate limiter:
+
+        ```python
+        rate_limiter = InMemoryRateLimiter(requests_per_second=5, max_bucket_size=5)
+
+        gpt = ChatOpenAI(model="gpt-4o", rate_limiter=rate_limiter.for_key("gpt-4o"))
+        mini = ChatOpenAI(
+            model="gpt-4o-mini", rate_limiter=rate_limiter.for_key("gpt-4o-mini")
+        )
+        ```
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        *,
+        requests_per_second: float = 1,
+        check_every_n_seconds: float = 0.1,
+        max_bucket_size: float = 1,
+        key_func: Callable[[], Hashable | None] | None = None,
+    ) -> None:
+        """A rate limiter based on a token bucket.
+
+        This rate limiter is designed to work in a threaded environment.
+
+        It works by filling up a bucket with tokens at a given rate. Each
+        request consumes a given number of tokens. If there are not enough
+        tokens in the bucket, the request is blocked until there are enough
+        tokens.
+
+        Args:
+            requests_per_second: The number of tokens to add per second to the bucket.
+                The tokens represent "credit" that can be used to make requests.
+            check_every_n_seconds: Unused, kept for backwards compatibility.
+                Waiting requests now sleep for exactly as long as it takes for
+                their tokens to become available.
+            max_bucket_size: The maximum number of tokens that can be in the bucket.
+                Must be at least `1`. Used to prevent bursts of requests.
+            key_func: Function returning the bucket key to use when `acquire` is
+                called without a `key`, e.g. reading the current end user from a
+                context variable. `None` uses a single shared bucket.
+        """
+        # Number of requests that we can make per second.
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max_bucket_size
+        self.check_every_n_seconds = check_every_n_seconds
+        self.key_func = key_func
+        # The bucket used when no key is given.
+        self._default_bucket = _Bucket()
+        self._buckets: dict[Hashable, _Bucket] = {}
+        # Guards the creation and pruning of keyed buckets, each bucket has its
+        # own lock for consuming tokens.
+        self._buckets_lock = threading.Lock()
+        self._prune_at = _MIN_PRUNE_AT
+
+    @property
+    def available_tokens(self) -> float:
+        """Number of tokens in the default bucket, as of the last consumption."""
+        return self._default_bucket.tokens
+
+    @available_tokens.setter
+    def available_tokens(self, value: float) -> None:
+        self._default_bucket.tokens = value
+
+    @property
+    def last(self) -> float | None:
+        """The last time tokens were consumed from the default bucket."""
+        return self._default_bucket.last
+
+    @last.setter
+    def last(self, value: float | None) -> None:
+        self._default_bucket.last = value
+
+    def for_key(self, key: Hashable, *, weight: float = 1) -> BaseRateLimiter:
+        """Return a rate limiter that acquires from the bucket for `key`.
+
+        The returned rate limiter can be passed as the `rate_limiter` of a chat
+        model, so that several models share this rate limiter but not a bucket.
+
+        Args:
+            key: The bucket key, e.g. a model name.
+            weight: The number of tokens each request consumes.
+
+        Returns:
+            A rate limiter backed by this one.
+        """
+        return _KeyedRateLimiter(self, key, weight)
+
+    def _get_bucket(self, key: Hashable | None) -> _Bucket:
+        if key is None and self.key_func is not None:
+            key = self.key_func()
+        if key is None:
+            return self._default_bucket
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._buckets_lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    if len(self._buckets) >= self._prune_at:
+                        self._prune()
+                    bucket = self._buckets[key] = _Bucket()
+        return bucket
+
+    def _prune(self) -> None:
+        """Drop keyed buckets that have been idle long enough to be full.
+
+        Must be called with `_buckets_lock` held. A pruned key starts over with
+        an empty bucket, which is never less restrictive than a full one.
+        """
+        now = time.monotonic()
+        idle = [
+            key
+            for key, bucket in self._buckets.items()
+            if bucket.last is None
+            or bucket.tokens + (now - bucket.last) * self.requests_per_second
+            >= self.max_bucket_size
+        ]
+        for key in idle:
+            del self._buckets[key]
+        self._prune_at = max(_MIN_PRUNE_AT, 2 * len(self._buckets))
+
+    def _reserve(self, bucket: _Bucket, weight: float, *, blocking: bool) -> float:
+        """Take `weight` tokens from `bucket`.
+
+        Args:
+            bucket: The bucket to take tokens from.
+            weight: The number of tokens to take.
+            blocking: Whether to take the tokens even if they are not available
+                yet, i.e. reserve them.
+
+        Returns:
+            The number of seconds to wait until the tokens are available, `0` if
+            they are available now, or `-1` if they are not available and
+            `blocking` is `False`, in which case nothing was taken.
+        """
+        with bucket.lock:
+            now = time.monotonic()
+
+            # initialize on first call to avoid a burst
+            if bucket.last is None:
+                bucket.last = now
+
+            # Make sure that we don't exceed the bucket size.
+            # This is used to prevent bursts of requests.
+            tokens = min(
+                bucket.tokens + (now - bucket.last) * self.requests_per_second,
+                self.max_bucket_size,
+            )
+
+            if tokens >= weight:
+                bucket.tokens = tokens - weight
+                bucket.last = now
+                return 0
+            if not blocking:
+                return -1
+            # Reserve the tokens, leaving the bucket in debt until they have been
+            # refilled. Later callers wait for that debt to be repaid first.
+            bucket.tokens = tokens - weight
+            bucket.last = now
+            return (weight - tokens) / self.requests_per_second
+
+    def _refund(self, bucket: _Bucket, weight: float) -> None:
+        """Give back tokens reserved by a waiter that was cancelled."""
+        with bucket.lock:
+            bucket.tokens += weight
+
+    def acquire(
+        self,
+        *,
+        blocking: bool = True,
+        key: Hashable | None = None,
+        weight: float = 1,
+    ) -> bool:
+        """Attempt to acquire tokens from the rate limiter.
+
+        This method blocks until the required tokens are available if `blocking`
+        is set to `True`.
+
+        If `blocking` is set to `False`, the method will immediately return the result
+        of the attempt to acquire the tokens.
+
+        Args:
+            blocking: If `True`, the method will block until the tokens are available.
+                If `False`, the method will return immediately with the result of
+                the attempt.
+            key: The bucket to acquire from. Defaults to the result of `key_func`,
+                or the shared bucket.
+            weight: The number of tokens to acquire.
+
+        Returns:
+            `True` if the tokens were successfully acquired, `False` otherwise.
+        """
+        wait = self._reserve(self._get_bucket(key), weight, blocking=blocking)
+        if wait < 0:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(
+        self,
+        *,
+        blocking: bool = True,
+        key: Hashable | None = None,
+        weight: float = 1,
+    ) -> bool:
+        """Attempt to acquire tokens from the rate limiter. Async version.
+
+        This method blocks until the required tokens are available if `blocking`
+        is set to `True`.
+
+        If `blocking` is set to `False`, the method will immediately return the result
+        of the attempt to acquire the tokens.
+
+        Args:
+            blocking: If `True`, the method will block until the tokens are available.
+                If `False`, the method will return immediately with the result of
+                the attempt.
+            key: The bucket to acquire from. Defaults to the result of `key_func`,
+                or the shared bucket.
+            weight: The number of tokens to acquire.
+
+        Returns:
+            `True` if the tokens were successfully acquired, `False` otherwise.
+        """
+        bucket = self._get_bucket(key)
+        wait = self._reserve(bucket, weight, blocking=blocking)
+        if wait < 0:
+            return False
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(bucket, weight)
+                raise
+        return True
+
+
+class _KeyedRateLimiter(BaseRateLimiter):
+    """View of an `InMemoryRateLimiter` that acquires from a single bucket."""
+
+    def __init__(self, limiter: InMemoryRateLimiter, key: Hashable, weight: float):
+        self.limiter = limiter
+        self.key = key
+        self.weight = weight
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.limiter.acquire(
+            blocking=blocking, key=self.key, weight=self.weight
+        )
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        return await self.limiter.aacquire(
+            blocking=blocking, key=self.key, weight=self.weight
+        )
+
+
+# Number of keyed buckets above which idle buckets are pruned.
+_MIN_PRUNE_AT = 1024
+
+
+__all__ = [
+    "BaseRateLimiter",
+    "InMemoryRateLimiter",
+]
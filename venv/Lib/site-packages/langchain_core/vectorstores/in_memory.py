@@ -0,0 +1,1200 @@
+"""In-memory vector store."""
+
+from __future__ import annotations
+
+import json
+import struct
+import uuid
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Literal,
+    cast,
+)
+
+from typing_extensions import override
+
+from langchain_core.documents import Document
+from langchain_core.load import dumpd, load
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import _cosine_similarity as cosine_similarity
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+
+    from langchain_core.embeddings import Embeddings
+
+try:
+    import numpy as np
+
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
+
+# Constructor arguments accepted by `from_texts` and `afrom_texts`
+_INIT_KWARGS = ("vector_index", "ivf_nprobe", "metadata_index")
+# Rows allocated when the vector matrix is created, doubled when it is full
+_INITIAL_CAPACITY = 1024
+# Number of vectors from which `vector_index="ivf"` clusters them. Smaller
+# stores are searched exactly. Clusters are retrained when the store has grown
+# by `_IVF_RETRAIN_GROWTH` since the last training.
+_IVF_MIN_TRAIN_SIZE = 10_000
+_IVF_RETRAIN_GROWTH = 4
+# Vectors sampled per cluster, and iterations, to train the clusters with
+_IVF_SAMPLES_PER_CLUSTER = 64
+_IVF_TRAIN_ITERATIONS = 10
+# Rows scored at once when assigning vectors to clusters
+_IVF_ASSIGN_BATCH_SIZE = 8192
+# Header of files written by `InMemoryVectorStore.dump(..., binary=True)`
+_BINARY_MAGIC = b"LCVSBIN1"
+
+
+class InMemoryVectorStore(VectorStore):
+    """In-memory vector store implementation.
+
+    Uses a dictionary, and computes cosine similarity for search using numpy.
+
+    Setup:
+        Install `langchain-core`.
+
+        ```bash
+        pip install -U langchain-core
+        ```
+
+    Key init args — indexing params:
+        embedding_function: Embeddings
+            Embedding function to use.
+        vector_index: Literal["matrix", "ivf"] | None
+            Keep vectors in a preallocated numpy matrix (`"matrix"`), optionally
+            clustered into an inverted file index for approximate search
+            (`"ivf"`). Defaults to scanning the `store` dictionary.
+        metadata_index: Sequence[str]
+            Metadata fields to index for dict filters.
+
+    Instantiate:
+        ```python
+        from langchain_core.vectorstores import InMemoryVectorStore
+        from langchain_openai import OpenAIEmbeddings
+
+        vector_store = InMemoryVectorStore(OpenAIEmbeddings())
+        ```
+
+    Add Documents:
+        ```python
+        from langchain_core.documents import Document
+
+        document_1 = Document(id="1", page_content="foo", metadata={"baz": "bar"})
+        document_2 = Document(id="2", page_content="thud", metadata={"bar": "baz"})
+        document_3 = Document(id="3", page_content="i will be deleted :(")
+
+        documents = [document_1, document_2, document_3]
+        vector_store.add_documents(documents=documents)
+        ```
+
+    Inspect documents:
+        ```python
+        top_n = 10
+        for index, (id, doc) in enumerate(vector_store.store.items()):
+            if index < top_n:
+                # docs have keys 'id', 'vector', 'text', 'metadata'
+                print(f"{id}: {doc['text']}")
+            else:
+                break
+        ```
+
+    Delete Documents:
+        ```python
+        vector_store.delete(ids=["3"])
+        ```
+
+    Search:
+        ```python
+        results = vector_store.similarity_search(query="thud", k=1)
+        for doc in results:
+            print(f"* {doc.page_content} [{doc.metadata}]")
+        ```
+
+        ```txt
+        * thud [{'bar': 'baz'}]
+        ```
+
+    Search with filter:
+        ```python
+        def _filter_function(doc: Document) -> bool:
+            return doc.metadata.get("bar") == "baz"
+
+
+        results = vector_store.similarity_search(
+            query="thud", k=1, filter=_filter_function
+        )
+        for doc in results:
+            print(f"* {doc.page_content} [{doc.metadata}]")
+        ```
+
+        ```txt
+        * thud [{'bar': 'baz'}]
+        ```
+
+    Search with metadata filter:
+        A dict filter matches metadata values, either one value or any of the
+        values listed under `"$in"`. Fields listed in `metadata_index` are looked
+        up in an inverted index, so only matching documents are scored.
+
+        ```python
+        vector_store = InMemoryVectorStore(OpenAIEmbeddings(), metadata_index=["bar"])
+        vector_store.add_documents(documents=documents)
+
+        results = vector_store.similarity_search(
+            query="thud", k=1, filter={"bar": {"$in": ["baz", "qux"]}}
+        )
+        ```
+
+    Approximate search:
+        With `vector_index="ivf"`, vectors are clustered with k-means once the
+        store holds enough of them, and a query only scores the vectors of the
+        `ivf_nprobe` clusters closest to it. Larger values of `nprobe` trade
+        speed for recall, and can also be passed per search.
+
+        ```python
+        vector_store = InMemoryVectorStore(
+            OpenAIEmbeddings(), vector_index="ivf", ivf_nprobe=16
+        )
+        vector_store.add_documents(documents=documents)
+
+        results = vector_store.similarity_search(query="thud", k=1, nprobe=32)
+        ```
+
+    Save and load:
+        ```python
+        vector_store.dump("store.bin", binary=True)
+        vector_store = InMemoryVectorStore.load("store.bin", OpenAIEmbeddings())
+        ```
+
+    Search with score:
+        ```python
+        results = vector_store.similarity_search_with_score(query="qux", k=1)
+        for doc, score in results:
+            print(f"* [SIM={score:3f}] {doc.page_content} [{doc.metadata}]")
+        ```
+
+        ```txt
+        * [SIM=0.832268] foo [{'baz': 'bar'}]
+        ```
+
+    Async:
+        ```python
+        # add documents
+        # await vector_store.aadd_documents(documents=documents)
+
+        # delete documents
+        # await vector_store.adelete(ids=["3"])
+
+        # search
+        # results = vector_store.asimilarity_search(query="thud", k=1)
+
+        # search with score
+        results = await vector_store.asimilarity_search_with_score(query="qux", k=1)
+        for doc, score in results:
+            print(f"* [SIM={score:3f}] {doc.page_content} [{doc.metadata}]")
+        ```
+
+        ```txt
+        * [SIM=0.832268] foo [{'baz': 'bar'}]
+        ```
+
+    Use as Retriever:
+        ```python
+        retriever = vector_store.as_retriever(
+            search_type="mmr",
+            search_kwargs={"k": 1, "fetch_k": 2, "lambda_mult": 0.5},
+        )
+        retriever.invoke("thud")
+        ```
+
+        ```txt
+        [Document(id='2', metadata={'bar': 'baz'}, page_content='thud')]
+        ```
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        *,
+        vector_index: Literal["matrix", "ivf"] | None = None,
+        ivf_nprobe: int = 16,
+        metadata_index: Sequence[str] = (),
+    ) -> None:
+        """Initialize with the given embedding function.
+
+        Args:
+            embedding: embedding function to use.
+            vector_index: `"matrix"` to search a preallocated numpy matrix of all
+                vectors exactly, `"ivf"` to additionally cluster it for approximate
+                search. `None` scans the `store` dictionary. Both indexes require
+                numpy, and are only kept in sync by the methods of this class, so
+                `store` must not be modified directly.
+            ivf_nprobe: Number of clusters to search with `vector_index="ivf"`.
+            metadata_index: Metadata fields to keep an inverted index for, used by
+                dict filters.
+
+        Raises:
+            ImportError: If `vector_index` is set and numpy is not installed.
+            ValueError: If `vector_index` is not supported.
+        """
+        # TODO: would be nice to change to
+        # dict[str, Document] at some point (will be a breaking change)
+        self.store: dict[str, dict[str, Any]] = {}
+        self.embedding = embedding
+        if vector_index not in (None, "matrix", "ivf"):
+            msg = f"Unsupported vector_index: {vector_index!r}"
+            raise ValueError(msg)
+        if vector_index is not None and not _HAS_NUMPY:
+            msg = (
+                "numpy must be installed to use vector_index. "
+                "Please install numpy with `pip install numpy`."
+            )
+            raise ImportError(msg)
+        if ivf_nprobe < 1:
+            msg = "ivf_nprobe must be at least 1"
+            raise ValueError(msg)
+        self.vector_index = vector_index
+        self.ivf_nprobe = ivf_nprobe
+        self._matrix: _VectorMatrix | None = None
+        self._ivf: _IVFIndex | None = None
+        self._metadata_index = _MetadataIndex(metadata_index)
+
+    @property
+    @override
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @override
+    def delete(self, ids: Sequence[str] | None = None, **kwargs: Any) -> None:
+        if ids:
+            for _id in ids:
+                doc = self.store.pop(_id, None)
+                if doc is None:
+                    continue
+                if self._matrix is None:
+                    self._metadata_index.remove(_id, doc["metadata"])
+                elif (row := self._matrix.remove(_id)) is not None:
+                    self._metadata_index.remove(row, doc["metadata"])
+                    if self._ivf is not None:
+                        self._ivf.remove(row)
+
+    @override
+    async def adelete(self, ids: Sequence[str] | None = None, **kwargs: Any) -> None:
+        self.delete(ids)
+
+    @override
+    def add_documents(
+        self,
+        documents: list[Document],
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = [doc.page_content for doc in documents]
+        vectors = self.embedding.embed_documents(texts)
+
+        if ids and len(ids) != len(texts):
+            msg = (
+                f"ids must be the same length as texts. "
+                f"Got {len(ids)} ids and {len(texts)} texts."
+            )
+            raise ValueError(msg)
+
+        id_iterator: Iterator[str | None] = (
+            iter(ids) if ids else iter(doc.id for doc in documents)
+        )
+
+        ids_ = []
+
+        entries = []
+
+        for doc, vector in zip(documents, vectors, strict=False):
+            doc_id = next(id_iterator)
+            doc_id_ = doc_id or str(uuid.uuid4())
+            ids_.append(doc_id_)
+            entries.append(
+                {
+                    "id": doc_id_,
+                    "vector": vector,
+                    "text": doc.page_content,
+                    "metadata": doc.metadata,
+                }
+            )
+        self._add_entries(entries)
+
+        return ids_
+
+    @override
+    async def aadd_documents(
+        self, documents: list[Document], ids: list[str] | None = None, **kwargs: Any
+    ) -> list[str]:
+        texts = [doc.page_content for doc in documents]
+        vectors = await self.embedding.aembed_documents(texts)
+
+        if ids and len(ids) != len(texts):
+            msg = (
+                f"ids must be the same length as texts. "
+                f"Got {len(ids)} ids and {len(texts)} texts."
+            )
+            raise ValueError(msg)
+
+        id_iterator: Iterator[str | None] = (
+            iter(ids) if ids else iter(doc.id for doc in documents)
+        )
+        ids_: list[str] = []
+
+        entries = []
+
+        for doc, vector in zip(documents, vectors, strict=False):
+            doc_id = next(id_iterator)
+            doc_id_ = doc_id or str(uuid.uuid4())
+            ids_.append(doc_id_)
+            entries.append(
+                {
+                    "id": doc_id_,
+                    "vector": vector,
+                    "text": doc.page_content,
+                    "metadata": doc.metadata,
+                }
+            )
+        self._add_entries(entries)
+
+        return ids_
+
+    def _add_entries(self, entries: list[dict[str, Any]]) -> None:
+        """Add or replace `store` entries, keeping the indexes in sync."""
+        # the last entry wins if an id is repeated
+        entries = list({entry["id"]: entry for entry in entries}.values())
+        slots: list[Hashable]
+        if self.vector_index is not None and entries:
+            if self._matrix is None:
+                self._matrix = _VectorMatrix(len(entries[0]["vector"]))
+            # replaced documents keep their row
+            rows = self._matrix.add(
+                [entry["id"] for entry in entries],
+                [entry["vector"] for entry in entries],
+            )
+            if self.vector_index == "ivf":
+                if self._ivf is None:
+                    self._ivf = _IVFIndex(self._matrix)
+                self._ivf.add(rows)
+            slots = rows.tolist()
+        else:
+            slots = [entry["id"] for entry in entries]
+        for slot, entry in zip(slots, entries, strict=True):
+            if (old := self.store.get(entry["id"])) is not None:
+                self._metadata_index.remove(slot, old["metadata"])
+            self.store[entry["id"]] = entry
+            self._metadata_index.add(slot, entry["metadata"])
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the indexes after `store` was replaced."""
+        if self.vector_index is None and not self._metadata_index.fields:
+            return
+        self._matrix = None
+        self._ivf = None
+        self._metadata_index = _MetadataIndex(self._metadata_index.fields)
+        entries = list(self.store.values())
+        self.store = {}
+        self._add_entries(entries)
+
+    @override
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        """Get documents by their ids.
+
+        Args:
+            ids: The IDs of the documents to get.
+
+        Returns:
+            A list of `Document` objects.
+        """
+        documents = []
+
+        for doc_id in ids:
+            doc = self.store.get(doc_id)
+            if doc:
+                documents.append(
+                    Document(
+                        id=doc["id"],
+                        page_content=doc["text"],
+                        metadata=doc["metadata"],
+                    )
+                )
+        return documents
+
+    @override
+    async def aget_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        """Async get documents by their ids.
+
+        Args:
+            ids: The IDs of the documents to get.
+
+        Returns:
+            A list of `Document` objects.
+        """
+        return self.get_by_ids(ids)
+
+    def _similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Callable[[Document], bool] | dict[str, Any] | None = None,  # noqa: A002
+        nprobe: int | None = None,
+    ) -> list[tuple[Document, float, list[float]]]:
+        if self._matrix is not None:
+            return self._similarity_search_matrix(embedding, k, filter, nprobe)
+
+        if isinstance(filter, dict):
+            docs = self._filter_docs(filter)
+        else:
+            # get all docs with fixed order in list
+            docs = list(self.store.values())
+
+            if filter is not None:
+                docs = [
+                    doc
+                    for doc in docs
+                    if filter(
+                        Document(
+                            id=doc["id"],
+                            page_content=doc["text"],
+                            metadata=doc["metadata"],
+                        )
+                    )
+                ]
+
+        if not docs:
+            return []
+
+        similarity = cosine_similarity([embedding], [doc["vector"] for doc in docs])[0]
+
+        # get the indices ordered by similarity score
+        top_k_idx = _top_k_indices(similarity, k)
+
+        return [
+            (
+                Document(
+                    id=doc_dict["id"],
+                    page_content=doc_dict["text"],
+                    metadata=doc_dict["metadata"],
+                ),
+                float(similarity[idx].item()),
+                doc_dict["vector"],
+            )
+            for idx in top_k_idx
+            # Assign using walrus operator to avoid multiple lookups
+            if (doc_dict := docs[idx])
+        ]
+
+    def _filter_docs(self, filter: dict[str, Any]) -> list[dict[str, Any]]:  # noqa: A002
+        """Get the `store` entries matching a dict filter.
+
+        Only used without a vector matrix, so the index slots are document ids.
+        """
+        ids, residual = self._metadata_index.resolve(filter)
+        docs: Iterable[dict[str, Any]] = (
+            self.store.values()
+            if ids is None
+            else [self.store[cast("str", i)] for i in ids]
+        )
+        return [doc for doc in docs if _matches(doc["metadata"], residual)]
+
+    def _similarity_search_matrix(
+        self,
+        embedding: list[float],
+        k: int,
+        filter: Callable[[Document], bool] | dict[str, Any] | None,  # noqa: A002
+        nprobe: int | None,
+    ) -> list[tuple[Document, float, list[float]]]:
+        matrix = cast("_VectorMatrix", self._matrix)
+        query = np.asarray(embedding, dtype=np.float32)
+
+        # rows allowed by the inverted index, and a check for anything else
+        rows: np.ndarray | None = None
+        accept: Callable[[int], bool] | None = None
+        if isinstance(filter, dict):
+            slots, residual = self._metadata_index.resolve(filter)
+            if slots is not None:
+                rows = np.fromiter(slots, dtype=np.intp, count=len(slots))
+            if residual:
+
+                def accept(row: int) -> bool:
+                    doc = self.store[matrix.ids[row]]  # type: ignore[index]
+                    return _matches(doc["metadata"], residual)
+
+        elif filter is not None:
+
+            def accept(row: int) -> bool:
+                doc = self.store[matrix.ids[row]]  # type: ignore[index]
+                return filter(
+                    Document(
+                        id=doc["id"], page_content=doc["text"], metadata=doc["metadata"]
+                    )
+                )
+
+        if self._ivf is not None and self._ivf.centroids is not None:
+            candidates = self._ivf.candidates(query, nprobe or self.ivf_nprobe)
+            # a selective pre-filter is cheaper to search exactly
+            if rows is None or len(rows) > len(candidates):
+                if rows is not None:
+                    candidates = np.intersect1d(candidates, rows, assume_unique=True)
+                hits = self._top_rows(query, candidates, k, accept)
+                if len(hits) >= k:
+                    return hits
+                # too few matches in the probed clusters, fall back to exact
+
+        return self._top_rows(query, rows, k, accept)
+
+    def _top_rows(
+        self,
+        query: np.ndarray,
+        rows: np.ndarray | None,
+        k: int,
+        accept: Callable[[int], bool] | None,
+    ) -> list[tuple[Document, float, list[float]]]:
+        """Score `rows` of the matrix (all rows if `None`) and get the top `k`."""
+        matrix = cast("_VectorMatrix", self._matrix)
+        scores = matrix.scores(query, rows)
+        if rows is None:
+            rows = np.arange(len(scores))
+        ranked: Iterable[int] = (
+            _top_k_indices(scores, k).tolist()
+            if accept is None
+            # only rank as much as needed to find k accepted rows
+            else _iter_ranked(scores, max(4 * k, 64))
+        )
+        results = []
+        for idx in ranked:
+            score = float(scores[idx].item())
+            if score == -np.inf:
+                # deleted rows sort last
+                break
+            row = int(rows[idx])
+            if accept is not None and not accept(row):
+                continue
+            doc_dict = self.store[matrix.ids[row]]  # type: ignore[index]
+            results.append(
+                (
+                    Document(
+                        id=doc_dict["id"],
+                        page_content=doc_dict["text"],
+                        metadata=doc_dict["metadata"],
+                    ),
+                    score,
+                    doc_dict["vector"],
+                )
+            )
+            if len(results) == k:
+                break
+        return results
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Callable[[Document], bool] | dict[str, Any] | None = None,  # noqa: A002
+        nprobe: int | None = None,
+        **_kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        """Search for the most similar documents to the given embedding.
+
+        Args:
+            embedding: The embedding to search for.
+            k: The number of documents to return.
+            filter: A function to filter the documents, or a dict of metadata
+                values to match. A dict maps each field to a value, or to
+                `{"$in": [...]}` to match any of several values.
+            nprobe: Number of clusters to search with `vector_index="ivf"`.
+                Defaults to `ivf_nprobe`.
+
+        Returns:
+            A list of tuples of Document objects and their similarity scores.
+        """
+        return [
+            (doc, similarity)
+            for doc, similarity, _ in self._similarity_search_with_score_by_vector(
+                embedding=embedding, k=k, filter=filter, nprobe=nprobe
+            )
+        ]
+
+    @override
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        embedding = self.embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(
+            embedding,
+            k,
+            **kwargs,
+        )
+
+    @override
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        embedding = await self.embedding.aembed_query(query)
+        return self.similarity_search_with_score_by_vector(
+            embedding,
+            k,
+            **kwargs,
+        )
+
+    @override
+    def similarity_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        **kwargs: Any,
+    ) -> list[Document]:
+        docs_and_scores = self.similarity_search_with_score_by_vector(
+            embedding,
+            k,
+            **kwargs,
+        )
+        return [doc for doc, _ in docs_and_scores]
+
+    @override
+    async def asimilarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return self.similarity_search_by_vector(embedding, k, **kwargs)
+
+    @override
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    @override
+    async def asimilarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            doc
+            for doc, _ in await self.asimilarity_search_with_score(query, k, **kwargs)
+        ]
+
+    @override
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        *,
+        filter: Callable[[Document], bool] | dict[str, Any] | None = None,
+        nprobe: int | None = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        prefetch_hits = self._similarity_search_with_score_by_vector(
+            embedding=embedding,
+            k=fetch_k,
+            filter=filter,
+            nprobe=nprobe,
+        )
+
+        if not _HAS_NUMPY:
+            msg = (
+                "numpy must be installed to use max_marginal_relevance_search "
+                "pip install numpy"
+            )
+            raise ImportError(msg)
+
+        mmr_chosen_indices = maximal_marginal_relevance(
+            np.array(embedding, dtype=np.float32),
+            [vector for _, _, vector in prefetch_hits],
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [prefetch_hits[idx][0] for idx in mmr_chosen_indices]
+
+    @override
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> list[Document]:
+        embedding_vector = self.embedding.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(
+            embedding_vector,
+            k,
+            fetch_k,
+            lambda_mult=lambda_mult,
+            **kwargs,
+        )
+
+    @override
+    async def amax_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> list[Document]:
+        embedding_vector = await self.embedding.aembed_query(query)
+        return self.max_marginal_relevance_search_by_vector(
+            embedding_vector,
+            k,
+            fetch_k,
+            lambda_mult=lambda_mult,
+            **kwargs,
+        )
+
+    @classmethod
+    @override
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> InMemoryVectorStore:
+        store = cls(
+            embedding=embedding,
+            **{key: kwargs.pop(key) for key in _INIT_KWARGS if key in kwargs},
+        )
+        store.add_texts(texts=texts, metadatas=metadatas, **kwargs)
+        return store
+
+    @classmethod
+    @override
+    async def afrom_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> InMemoryVectorStore:
+        store = cls(
+            embedding=embedding,
+            **{key: kwargs.pop(key) for key in _INIT_KWARGS if key in kwargs},
+        )
+        await store.aadd_texts(texts=texts, metadatas=metadatas, **kwargs)
+        return store
+
+    @classmethod
+    def load(
+        cls, path: str, embedding: Embeddings, **kwargs: Any
+    ) -> InMemoryVectorStore:
+        """Load a vector store from a file.
+
+        Both the JSON and the binary formats written by `dump` are supported.
+
+        Args:
+            path: The path to load the vector store from.
+            embedding: The embedding to use.
+            **kwargs: Additional arguments to pass to the constructor.
+
+        Returns:
+            A VectorStore object.
+        """
+        path_: Path = Path(path)
+        with path_.open("rb") as f:
+            binary = f.read(len(_BINARY_MAGIC)) == _BINARY_MAGIC
+        if binary:
+            store = _load_binary(path_)
+        else:
+            with path_.open("r", encoding="utf-8") as f:
+                store = load(json.load(f))
+        vectorstore = cls(embedding=embedding, **kwargs)
+        vectorstore.store = store
+        vectorstore._rebuild_indexes()
+        return vectorstore
+
+    def dump(self, path: str, *, binary: bool = False) -> None:
+        """Dump the vector store to a file.
+
+        Args:
+            path: The path to dump the vector store to.
+            binary: Write vectors as raw float32 instead of JSON. Binary files
+                are several times smaller and faster to load, but require numpy
+                and vectors of the same length.
+
+        Raises:
+            ImportError: If `binary` is set and numpy is not installed.
+        """
+        path_: Path = Path(path)
+        path_.parent.mkdir(exist_ok=True, parents=True)
+        if binary:
+            _dump_binary(path_, self.store)
+            return
+        store = {
+            id_: {**doc, "vector": doc["vector"].tolist()}
+            if _HAS_NUMPY and isinstance(doc["vector"], np.ndarray)
+            else doc
+            for id_, doc in self.store.items()
+        }
+        with path_.open("w", encoding="utf-8") as f:
+            json.dump(dumpd(store), f, indent=2)
+
+
+class _VectorMatrix:
+    """Preallocated float32 matrix of vectors, addressed by stable row numbers.
+
+    Rows of deleted vectors are reused by later additions.
+    """
+
+    def __init__(self, dims: int) -> None:
+        self.dims = dims
+        self.vectors = np.zeros((_INITIAL_CAPACITY, dims), dtype=np.float32)
+        self.norms = np.zeros(_INITIAL_CAPACITY, dtype=np.float32)
+        self.alive = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        # document id of each row in use, up to the highest row ever used
+        self.ids: list[str | None] = []
+        self.rows: dict[str, int] = {}
+        self.free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Add or replace vectors, returning their rows."""
+        array = np.asarray(vectors, dtype=np.float32)
+        if array.ndim != 2 or array.shape[1] != self.dims:  # noqa: PLR2004
+            msg = f"Expected vectors of length {self.dims}, got shape {array.shape}"
+            raise ValueError(msg)
+        rows = np.empty(len(ids), dtype=np.intp)
+        for i, id_ in enumerate(ids):
+            row = self.rows.get(id_)
+            if row is None:
+                if self.free:
+                    row = self.free.pop()
+                else:
+                    row = len(self.ids)
+                    self.ids.append(None)
+                self.rows[id_] = row
+                self.ids[row] = id_
+            rows[i] = row
+        self._reserve(len(self.ids))
+        self.vectors[rows] = array
+        self.norms[rows] = np.linalg.norm(array, axis=1)
+        self.alive[rows] = True
+        return rows
+
+    def remove(self, id_: str) -> int | None:
+        """Remove a vector, returning the row it used."""
+        row = self.rows.pop(id_, None)
+        if row is not None:
+            self.ids[row] = None
+            self.alive[row] = False
+            self.free.append(row)
+        return row
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        """Cosine similarity of `query` with `rows`, or with all rows if `None`.
+
+        Unused rows score `-inf` when scoring all rows.
+        """
+        if rows is None:
+            vectors = self.vectors[: len(self.ids)]
+            norms = self.norms[: len(self.ids)]
+        else:
+            vectors = self.vectors[rows]
+            norms = self.norms[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (vectors @ query) / (norms * np.linalg.norm(query))
+        scores[~np.isfinite(scores)] = 0.0
+        if rows is None:
+            scores[~self.alive[: len(self.ids)]] = -np.inf
+        return scores
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self.norms)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name in ("vectors", "norms", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+
+class _IVFIndex:
+    """Inverted file index over the rows of a `_VectorMatrix`.
+
+    Vectors are clustered with spherical k-means, and a query only scores the
+    vectors in the clusters whose centroids are closest to it. Clusters are
+    trained once the matrix holds `_IVF_MIN_TRAIN_SIZE` vectors; until then
+    `centroids` is `None` and the matrix should be searched exactly.
+    """
+
+    def __init__(self, matrix: _VectorMatrix) -> None:
+        self.matrix = matrix
+        self.centroids: np.ndarray | None = None
+        self.lists: list[set[int]] = []
+        self.trained_size = 0
+        # row -> cluster
+        self._assignment: dict[int, int] = {}
+        # cluster -> rows, cached until the cluster changes
+        self._arrays: dict[int, np.ndarray] = {}
+
+    def add(self, rows: np.ndarray) -> None:
+        if self.centroids is None or len(self.matrix) >= (
+            self.trained_size * _IVF_RETRAIN_GROWTH
+        ):
+            if len(self.matrix) >= _IVF_MIN_TRAIN_SIZE:
+                self.train()
+            return
+        for row, cluster in zip(
+            rows.tolist(), self._assign(rows).tolist(), strict=True
+        ):
+            self.remove(row)
+            self.lists[cluster].add(row)
+            self._assignment[row] = cluster
+            self._arrays.pop(cluster, None)
+
+    def remove(self, row: int) -> None:
+        cluster = self._assignment.pop(row, None)
+        if cluster is not None:
+            self.lists[cluster].discard(row)
+            self._arrays.pop(cluster, None)
+
+    def train(self) -> None:
+        """Cluster all vectors of the matrix, with about sqrt(n) clusters."""
+        rows = np.flatnonzero(self.matrix.alive[: len(self.matrix.ids)])
+        n_clusters = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(
+            rows,
+            size=min(len(rows), n_clusters * _IVF_SAMPLES_PER_CLUSTER),
+            replace=False,
+        )
+        data = _normalize(self.matrix.vectors[sample])
+        centroids = data[rng.choice(len(data), size=n_clusters, replace=False)]
+        for _ in range(_IVF_TRAIN_ITERATIONS):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            counts = np.bincount(labels, minlength=n_clusters)
+            nonempty = counts > 0
+            starts = np.cumsum(counts) - counts
+            sums = np.add.reduceat(
+                data[np.argsort(labels, kind="stable")], starts[nonempty], axis=0
+            )
+            # empty clusters keep their previous centroid
+            centroids[nonempty] = _normalize(sums)
+        self.centroids = centroids
+        self.trained_size = len(rows)
+        self.lists = [set() for _ in range(n_clusters)]
+        self._assignment = {}
+        self._arrays = {}
+        for row, cluster in zip(
+            rows.tolist(), self._assign(rows).tolist(), strict=True
+        ):
+            self.lists[cluster].add(row)
+            self._assignment[row] = cluster
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the `nprobe` clusters closest to `query`."""
+        centroids = cast("np.ndarray", self.centroids)
+        probe = _top_k_indices(centroids @ query, nprobe).tolist()
+        arrays = []
+        for cluster in probe:
+            array = self._arrays.get(cluster)
+            if array is None:
+                array = self._arrays[cluster] = np.fromiter(
+                    self.lists[cluster], dtype=np.intp, count=len(self.lists[cluster])
+                )
+            arrays.append(array)
+        return np.concatenate(arrays)
+
+    def _assign(self, rows: np.ndarray) -> np.ndarray:
+        """Closest cluster of each row."""
+        centroids = cast("np.ndarray", self.centroids)
+        return np.concatenate(
+            [
+                # centroids are unit length, so the highest dot product is also
+                # the highest cosine similarity
+                np.argmax(self.matrix.vectors[batch] @ centroids.T, axis=1)
+                for batch in np.array_split(
+                    rows, max(1, -(-len(rows) // _IVF_ASSIGN_BATCH_SIZE))
+                )
+            ]
+        )
+
+
+class _MetadataIndex:
+    """Inverted index from metadata values to the documents having them.
+
+    Documents are identified by slots: their row in the vector matrix if there
+    is one, their id otherwise. Unhashable values are not indexed.
+    """
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self.fields = tuple(fields)
+        self._index: dict[str, dict[Hashable, set[Hashable]]] = {
+            field: {} for field in self.fields
+        }
+
+    def add(self, slot: Hashable, metadata: dict[str, Any]) -> None:
+        for field, values in self._index.items():
+            if field in metadata:
+                try:
+                    values.setdefault(metadata[field], set()).add(slot)
+                except TypeError:
+                    continue
+
+    def remove(self, slot: Hashable, metadata: dict[str, Any]) -> None:
+        for field, values in self._index.items():
+            if field in metadata:
+                try:
+                    slots = values.get(metadata[field])
+                except TypeError:
+                    continue
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del values[metadata[field]]
+
+    def resolve(
+        self,
+        filter: dict[str, Any],  # noqa: A002
+    ) -> tuple[set[Hashable] | None, dict[str, list[Any]]]:
+        """Look up a dict filter.
+
+        Returns:
+            The slots matching the conditions on indexed fields, or `None` if
+            there are none, and the conditions left to check on each document.
+        """
+        matches: list[set[Hashable]] = []
+        residual: dict[str, list[Any]] = {}
+        for field, condition in filter.items():
+            values = _filter_values(field, condition)
+            index = self._index.get(field)
+            if index is not None:
+                try:
+                    matches.append(set().union(*(index.get(v, ()) for v in values)))
+                    continue
+                except TypeError:
+                    # unhashable values can only be compared document by document
+                    pass
+            residual[field] = values
+        if not matches:
+            return None, residual
+        matches.sort(key=len)
+        return matches[0].intersection(*matches[1:]), residual
+
+
+def _filter_values(field: str, condition: Any) -> list[Any]:
+    """Values matched by the condition on `field` of a dict filter."""
+    if isinstance(condition, dict):
+        if condition.keys() == {"$eq"}:
+            return [condition["$eq"]]
+        if condition.keys() == {"$in"}:
+            return list(condition["$in"])
+        msg = (
+            f"Unsupported filter condition for {field!r}: {condition!r}. "
+            "Use a value, {'$eq': value} or {'$in': [values]}."
+        )
+        raise ValueError(msg)
+    return [condition]
+
+
+def _matches(metadata: dict[str, Any], conditions: dict[str, list[Any]]) -> bool:
+    return all(
+        field in metadata and metadata[field] in values
+        for field, values in conditions.items()
+    )
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, highest first."""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _iter_ranked(scores: np.ndarray, first: int) -> Iterator[int]:
+    """Indices of all scores, highest first, only sorting past `first` if needed."""
+    top = _top_k_indices(scores, first)
+    yield from top.tolist()
+    if len(top) < len(scores):
+        rest = np.ones(len(scores), dtype=bool)
+        rest[top] = False
+        idx = np.flatnonzero(rest)
+        yield from idx[np.argsort(-scores[idx], kind="stable")].tolist()
+
+
+def _dump_binary(path: Path, store: dict[str, dict[str, Any]]) -> None:
+    """Write `store` as a JSON header followed by a raw float32 matrix."""
+    if not _HAS_NUMPY:
+        msg = (
+            "numpy must be installed to dump in binary format. "
+            "Please install numpy with `pip install numpy`."
+        )
+        raise ImportError(msg)
+    docs = list(store.values())
+    dims = len(docs[0]["vector"]) if docs else 0
+    if any(len(doc["vector"]) != dims for doc in docs):
+        msg = "All vectors must have the same length to dump in binary format"
+        raise ValueError(msg)
+    vectors = np.asarray([doc["vector"] for doc in docs], dtype="<f4")
+    header = json.dumps(
+        {
+            "count": len(docs),
+            "dims": dims,
+            "ids": [doc["id"] for doc in docs],
+            "texts": [doc["text"] for doc in docs],
+            "metadata": dumpd([doc["metadata"] for doc in docs]),
+        }
+    ).encode("utf-8")
+    with path.open("wb") as f:
+        f.write(_BINARY_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(vectors.tobytes())
+
+
+def _load_binary(path: Path) -> dict[str, dict[str, Any]]:
+    """Read a store written by `_dump_binary`.
+
+    Vectors are returned as lists, like the ones loaded from JSON, so that they
+    can be modified and don't keep the whole file in memory.
+    """
+    if not _HAS_NUMPY:
+        msg = (
+            "numpy must be installed to load binary files. "
+            "Please install numpy with `pip install numpy`."
+        )
+        raise ImportError(msg)
+    data = path.read_bytes()
+    offset = len(_BINARY_MAGIC)
+    (size,) = struct.unpack_from("<Q", data, offset)
+    offset += struct.calcsize("<Q")
+    header = json.loads(data[offset : offset + size])
+    offset += size
+    count, dims = header["count"], header["dims"]
+    vectors = np.frombuffer(
+        data, dtype="<f4", count=count * dims, offset=offset
+    ).reshape(count, dims)
+    return {
+        id_: {"id": id_, "vector": vector, "text": text, "metadata": metadata}
+        for id_, vector, text, metadata in zip(
+            header["ids"],
+            vectors.tolist(),
+            header["texts"],
+            load(header["metadata"]),
+            strict=True,
+        )
+    }
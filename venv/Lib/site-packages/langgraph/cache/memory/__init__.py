@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Literal, NamedTuple
+
+from langgraph.cache.base import BaseCache, FullKey, Namespace, ValueT
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+# Number of least recently used entries considered when evicting with "lfu"
+LFU_SAMPLE_SIZE = 8
+
+
+class CacheStats(NamedTuple):
+    """Counters reported by `InMemoryCache.stats()`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    """Entries removed to stay within `max_entries`, `max_bytes` or
+    `max_entries_per_namespace`."""
+    expirations: int
+    """Entries removed because their TTL elapsed."""
+    entries: int
+    bytes: int
+
+
+class _Entry:
+    __slots__ = ("enc", "val", "expiry", "size", "hits", "used")
+
+    def __init__(
+        self, enc: str, val: bytes, expiry: float | None, size: int, used: int
+    ) -> None:
+        self.enc = enc
+        self.val = val
+        self.expiry = expiry
+        self.size = size
+        self.hits = 0
+        # tick of the last read or write, to compare recency across shards
+        self.used = used
+
+
+class _Totals:
+    """Entry and byte counts shared by all shards of a cache."""
+
+    __slots__ = ("lock", "entries", "bytes")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.entries = 0
+        self.bytes = 0
+
+    def add(self, entries: int, size: int) -> None:
+        with self.lock:
+            self.entries += entries
+            self.bytes += size
+
+
+class _Shard:
+    """A slice of the cache, with its own lock and eviction order."""
+
+    __slots__ = (
+        "totals",
+        "lock",
+        "order",
+        "namespaces",
+        "bytes",
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+    )
+
+    def __init__(self, totals: _Totals) -> None:
+        self.totals = totals
+        self.lock = threading.Lock()
+        # recency order, least recently used first
+        self.order: OrderedDict[FullKey, _Entry] = OrderedDict()
+        # namespace -> key -> None, in recency order, for per-namespace quotas
+        self.namespaces: dict[Namespace, OrderedDict[str, None]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def insert(self, full_key: FullKey, entry: _Entry) -> None:
+        if full_key in self.order:
+            self.remove(full_key)
+        self.order[full_key] = entry
+        self.namespaces.setdefault(full_key[0], OrderedDict())[full_key[1]] = None
+        self.bytes += entry.size
+        self.totals.add(1, entry.size)
+
+    def touch(self, full_key: FullKey, used: int) -> None:
+        self.order[full_key].used = used
+        self.order.move_to_end(full_key)
+        self.namespaces[full_key[0]].move_to_end(full_key[1])
+
+    def remove(self, full_key: FullKey) -> None:
+        entry = self.order.pop(full_key)
+        self.bytes -= entry.size
+        self.totals.add(-1, -entry.size)
+        ns_keys = self.namespaces[full_key[0]]
+        del ns_keys[full_key[1]]
+        if not ns_keys:
+            del self.namespaces[full_key[0]]
+
+    def victim(
+        self, policy: Literal["lru", "lfu"], candidates: Sequence[FullKey]
+    ) -> FullKey:
+        if policy == "lru" or len(candidates) == 1:
+            return candidates[0]
+        # least frequently used among the oldest entries, oldest wins ties
+        return min(candidates, key=lambda k: self.order[k].hits)
+
+    def sweep(self, now: float) -> None:
+        for full_key in [
+            k for k, e in self.order.items() if e.expiry is not None and now >= e.expiry
+        ]:
+            self.remove(full_key)
+            self.expirations += 1
+
+
+class InMemoryCache(BaseCache[ValueT]):
+    """In-memory cache with optional size bounds and background TTL sweeping.
+
+    Namespaces are spread over `shards` independently locked shards, so
+    concurrent graph runs only contend when they touch namespaces in the same
+    shard. All entries of a namespace live in one shard, which keeps
+    `max_entries_per_namespace` exact. `max_entries` and `max_bytes` are
+    checked against counters shared by all shards, and evict the least recently
+    used entries of whichever shards hold them, so they are exact too once
+    `set` returns.
+
+    Args:
+        serde: Serializer to use for values.
+        max_entries: Maximum number of entries to keep. `None` means unbounded.
+        max_bytes: Maximum total size of serialized values to keep.
+            `None` means unbounded.
+        max_entries_per_namespace: Maximum number of entries to keep for any
+            single namespace, e.g. the results of one node.
+        policy: Which entry to evict when a limit is reached. `"lru"` evicts the
+            least recently used entry, `"lfu"` the least frequently used among the
+            oldest entries.
+        shards: Number of independently locked shards.
+        sweep_interval: If set, expired entries are removed by a background
+            thread every `sweep_interval` seconds. Otherwise they are only
+            removed when read, or when `sweep()` is called.
+    """
+
+    def __init__(
+        self,
+        *,
+        serde: SerializerProtocol | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        max_entries_per_namespace: int | None = None,
+        policy: Literal["lru", "lfu"] = "lru",
+        shards: int = 8,
+        sweep_interval: float | None = None,
+    ):
+        super().__init__(serde=serde)
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported eviction policy: {policy!r}")
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        for limit in (max_entries, max_bytes, max_entries_per_namespace):
+            if limit is not None and limit < 1:
+                raise ValueError("Cache limits must be at least 1")
+        self.policy = policy
+        self._totals = _Totals()
+        self._shards = [_Shard(self._totals) for _ in range(shards)]
+        self._clock = itertools.count()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_ns_entries = max_entries_per_namespace
+        self._sweeper: _Sweeper | None = None
+        if sweep_interval is not None:
+            self._sweeper = _Sweeper(self, sweep_interval)
+            self._sweeper.start()
+
+    def _shard(self, full_key: FullKey) -> _Shard:
+        return self._shards[hash(full_key[0]) % len(self._shards)]
+
+    def get(self, keys: Sequence[FullKey]) -> dict[FullKey, ValueT]:
+        """Get the cached values for the given keys."""
+        if not keys:
+            return {}
+        now = time.monotonic()
+        found: list[tuple[FullKey, str, bytes]] = []
+        for ns_tuple, key in keys:
+            full_key = (Namespace(ns_tuple), key)
+            shard = self._shard(full_key)
+            with shard.lock:
+                entry = shard.order.get(full_key)
+                if entry is None:
+                    shard.misses += 1
+                elif entry.expiry is not None and now >= entry.expiry:
+                    shard.remove(full_key)
+                    shard.expirations += 1
+                    shard.misses += 1
+                else:
+                    shard.touch(full_key, next(self._clock))
+                    entry.hits += 1
+                    shard.hits += 1
+                    found.append((full_key, entry.enc, entry.val))
+        # deserialize outside of the locks
+        return {
+            full_key: self.serde.loads_typed((enc, val)) for full_key, enc, val in found
+        }
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict[FullKey, ValueT]:
+        """Asynchronously get the cached values for the given keys."""
+        return self.get(keys)
+
+    def set(self, keys: Mapping[FullKey, tuple[ValueT, int | None]]) -> None:
+        """Set the cached values for the given keys."""
+        now = time.monotonic()
+        # serialize outside of the locks
+        encoded = [
+            (
+                (Namespace(ns), key),
+                *self.serde.dumps_typed(value),
+                now + ttl if ttl is not None else None,
+            )
+            for (ns, key), (value, ttl) in keys.items()
+        ]
+        for full_key, enc, val, expiry in encoded:
+            entry = _Entry(
+                enc, val, expiry, len(val) + len(full_key[1]), next(self._clock)
+            )
+            shard = self._shard(full_key)
+            with shard.lock:
+                shard.insert(full_key, entry)
+                self._evict_namespace(shard, full_key[0])
+            self._evict()
+
+    def _evict_namespace(self, shard: _Shard, ns: Namespace) -> None:
+        """Evict entries of `ns` until it is within `max_entries_per_namespace`.
+
+        Must be called with the lock of `shard` held."""
+        if self._max_ns_entries is None:
+            return
+        ns_keys = shard.namespaces[ns]
+        while len(ns_keys) > self._max_ns_entries:
+            candidates = [(ns, k) for k in itertools.islice(ns_keys, LFU_SAMPLE_SIZE)]
+            shard.remove(shard.victim(self.policy, candidates))
+            shard.evictions += 1
+
+    def _over_limit(self) -> bool:
+        totals = self._totals
+        return (
+            self._max_entries is not None and totals.entries > self._max_entries
+        ) or (
+            self._max_bytes is not None
+            and totals.bytes > self._max_bytes
+            and totals.entries > 1
+        )
+
+    def _evict(self) -> None:
+        """Evict entries until the cache is within `max_entries` and `max_bytes`.
+
+        Victims are taken from the shard whose least recently used entry is
+        oldest. Shard locks are taken one at a time, so this never deadlocks
+        with concurrent writers."""
+        while self._over_limit():
+            oldest: _Shard | None = None
+            oldest_used = 0
+            for shard in self._shards:
+                with shard.lock:
+                    if shard.order:
+                        used = next(iter(shard.order.values())).used
+                        if oldest is None or used < oldest_used:
+                            oldest, oldest_used = shard, used
+            if oldest is None:
+                return
+            with oldest.lock:
+                if oldest.order and self._over_limit():
+                    candidates = list(itertools.islice(oldest.order, LFU_SAMPLE_SIZE))
+                    oldest.remove(oldest.victim(self.policy, candidates))
+                    oldest.evictions += 1
+
+    async def aset(self, keys: Mapping[FullKey, tuple[ValueT, int | None]]) -> None:
+        """Asynchronously set the cached values for the given keys."""
+        self.set(keys)
+
+    def clear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        """Delete the cached values for the given namespaces.
+        If no namespaces are provided, clear all cached values."""
+        for shard in self._shards:
+            with shard.lock:
+                if namespaces is None:
+                    self._totals.add(-len(shard.order), -shard.bytes)
+                    shard.order.clear()
+                    shard.namespaces.clear()
+                    shard.bytes = 0
+                else:
+                    for ns in namespaces:
+                        for key in list(shard.namespaces.get(ns, ())):
+                            shard.remove((ns, key))
+
+    async def aclear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        """Asynchronously delete the cached values for the given namespaces.
+        If no namespaces are provided, clear all cached values."""
+        self.clear(namespaces)
+
+    def sweep(self) -> None:
+        """Remove all expired entries."""
+        now = time.monotonic()
+        for shard in self._shards:
+            with shard.lock:
+                shard.sweep(now)
+
+    def stats(self) -> CacheStats:
+        """Return hit, miss, eviction and size counters for the cache."""
+        hits = misses = evictions = expirations = entries = size = 0
+        for shard in self._shards:
+            with shard.lock:
+                hits += shard.hits
+                misses += shard.misses
+                evictions += shard.evictions
+                expirations += shard.expirations
+                entries += len(shard.order)
+                size += shard.bytes
+        return CacheStats(hits, misses, evictions, expirations, entries, size)
+
+    def close(self) -> None:
+        """Stop the background sweeper, if any."""
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+
+
+class _Sweeper(threading.Thread):
+    """Daemon thread that periodically sweeps expired entries from a cache.
+
+    Only holds a weak reference to the cache, and exits once it is collected.
+    """
+
+    def __init__(self, cache: InMemoryCache, interval: float) -> None:
+        super().__init__(name="langgraph-cache-sweeper", daemon=True)
+        self._cache = weakref.ref(cache)
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            if (cache := self._cache()) is None:
+                return
+            cache.sweep()
+            del cache
+
+    def stop(self) -> None:
+        self._stopped.set()
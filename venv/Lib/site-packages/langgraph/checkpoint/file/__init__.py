@@ -0,0 +1,626 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import json
+import random
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    contextmanager,
+)
+from types import TracebackType
+from typing import Any, TypeVar
+
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_serializable_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import (
+    _msgpack_enc,
+    _msgpack_ext_hook_to_json,
+)
+
+T = TypeVar("T")
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class FileSaver(
+    BaseCheckpointSaver[str], AbstractContextManager, AbstractAsyncContextManager
+):
+    """A durable checkpoint saver that stores checkpoints in a single SQLite file.
+
+    Unlike `PersistentDict`, which rewrites the whole mapping on every sync,
+    each `put` only writes the checkpoint row plus the channels that changed
+    in `new_versions`, inside a single transaction. The database runs in WAL
+    mode, so other processes can read it while a writer is active, and nothing
+    is loaded into memory at startup.
+
+    The async methods run the sync implementation in the default executor.
+
+    Args:
+        conn: The SQLite connection to use. It must be created with
+            `check_same_thread=False` if the saver is used from multiple threads.
+        serde: The serializer to use for serializing and deserializing checkpoints.
+
+    Examples:
+
+            from langgraph.checkpoint.file import FileSaver
+            from langgraph.graph import StateGraph
+
+            builder = StateGraph(int)
+            builder.add_node("add_one", lambda x: x + 1)
+            builder.set_entry_point("add_one")
+            builder.set_finish_point("add_one")
+
+            with FileSaver.from_path("checkpoints.db") as memory:
+                graph = builder.compile(checkpointer=memory)
+                graph.invoke(1, {"configurable": {"thread_id": "thread-1"}})
+    """
+
+    conn: sqlite3.Connection
+    is_setup: bool
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        serde: SerializerProtocol | None = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.conn = conn
+        self.is_setup = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def from_path(
+        cls, path: str, *, serde: SerializerProtocol | None = None
+    ) -> Iterator[FileSaver]:
+        """Create a new `FileSaver` from a database file path.
+
+        Args:
+            path: Path of the SQLite database file. Created if it does not exist.
+            serde: The serializer to use for serializing and deserializing checkpoints.
+
+        Yields:
+            A new `FileSaver` instance. The connection is closed on exit.
+        """
+        conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            with cls(conn, serde=serde) as saver:
+                yield saver
+        finally:
+            conn.close()
+
+    def __enter__(self) -> FileSaver:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        return None
+
+    async def __aenter__(self) -> FileSaver:
+        return self
+
+    async def __aexit__(
+        self,
+        __exc_type: type[BaseException] | None,
+        __exc_value: BaseException | None,
+        __traceback: TracebackType | None,
+    ) -> bool | None:
+        return None
+
+    def setup(self) -> None:
+        """Create the database tables if they don't exist yet.
+
+        This method is called automatically on first use.
+        """
+        if self.is_setup:
+            return
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.is_setup = True
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        """Get a cursor for the database, holding the saver's lock.
+
+        Args:
+            transaction: Whether to commit the transaction when the cursor is closed.
+        """
+        with self.lock:
+            self.setup()
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            except BaseException:
+                if transaction:
+                    self.conn.rollback()
+                raise
+            else:
+                if transaction:
+                    self.conn.commit()
+            finally:
+                cur.close()
+
+    def _load_blobs(
+        self,
+        cur: sqlite3.Cursor,
+        thread_id: str,
+        checkpoint_ns: str,
+        versions: ChannelVersions,
+    ) -> dict[str, Any]:
+        if not versions:
+            return {}
+        channel_values: dict[str, Any] = {}
+        keys = [(k, str(v)) for k, v in versions.items()]
+        cur.execute(
+            "SELECT channel, type, blob FROM blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND (channel, version) IN "
+            f"(VALUES {', '.join('(?, ?)' for _ in keys)})",
+            (thread_id, checkpoint_ns, *(x for key in keys for x in key)),
+        )
+        for channel, type_, blob in cur.fetchall():
+            if type_ != "empty":
+                channel_values[channel] = self.serde.loads_typed((type_, blob))
+        return channel_values
+
+    def _row_to_tuple(
+        self,
+        cur: sqlite3.Cursor,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        parent_checkpoint_id: str | None,
+        type_: str,
+        checkpoint: bytes,
+        metadata: str,
+    ) -> CheckpointTuple:
+        checkpoint_: Checkpoint = self.serde.loads_typed((type_, checkpoint))
+        cur.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        )
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((t, v)))
+            for task_id, channel, t, v in cur.fetchall()
+        ]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_blobs(
+                    cur, thread_id, checkpoint_ns, checkpoint_["channel_versions"]
+                ),
+            },
+            metadata=json.loads(metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get a checkpoint tuple from the database.
+
+        If the config contains a `checkpoint_id` key, the checkpoint with the matching
+        thread ID and checkpoint ID is retrieved. Otherwise, the latest checkpoint for
+        the given thread ID is retrieved.
+
+        Args:
+            config: The config to use for retrieving the checkpoint.
+
+        Returns:
+            The retrieved checkpoint tuple, or None if no matching checkpoint was found.
+        """
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            args: tuple[Any, ...] = (thread_id, checkpoint_ns, checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+            args = (thread_id, checkpoint_ns)
+        with self.cursor(transaction=False) as cur:
+            cur.execute(query, args)
+            if row := cur.fetchone():
+                return self._row_to_tuple(cur, *row)
+        return None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints from the database, most recent first.
+
+        Args:
+            config: Base configuration for filtering checkpoints.
+            filter: Additional filtering criteria for metadata.
+            before: List checkpoints created before this configuration.
+            limit: Maximum number of checkpoints to return.
+
+        Yields:
+            An iterator of matching checkpoint tuples.
+        """
+        wheres: list[str] = []
+        args: list[Any] = []
+        if config:
+            wheres.append("thread_id = ?")
+            args.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                wheres.append("checkpoint_ns = ?")
+                args.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                wheres.append("checkpoint_id = ?")
+                args.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            wheres.append("checkpoint_id < ?")
+            args.append(before_checkpoint_id)
+        for query_key, query_value in (filter or {}).items():
+            if query_value is None:
+                wheres.append("json_extract(metadata, ?) IS NULL")
+                args.append(_json_path(query_key))
+                continue
+            if not isinstance(query_value, (str, int, float, bool, list, dict)):
+                # match the form `put` stored it in, e.g. a UUID as its string
+                query_value = _json_default(query_value)
+            if isinstance(query_value, (str, int, float)):
+                wheres.append("json_extract(metadata, ?) = ?")
+                args.extend((_json_path(query_key), query_value))
+            else:
+                wheres.append("json_extract(metadata, ?) = json(?)")
+                args.extend(
+                    (
+                        _json_path(query_key),
+                        json.dumps(query_value, default=_json_default),
+                    )
+                )
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata FROM checkpoints"
+        )
+        if wheres:
+            query += " WHERE " + " AND ".join(wheres)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self.cursor(transaction=False) as cur:
+            cur.execute(query, args)
+            rows = cur.fetchall()
+        for row in rows:
+            # don't hold the lock while the caller consumes the iterator
+            with self.cursor(transaction=False) as cur:
+                item = self._row_to_tuple(cur, *row)
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint to the database.
+
+        Only the channels listed in `new_versions` are written, so the cost of a
+        `put` is proportional to what changed since the parent checkpoint.
+
+        Args:
+            config: The config to associate with the checkpoint.
+            checkpoint: The checkpoint to save.
+            metadata: Additional metadata to save with the checkpoint.
+            new_versions: New versions as of this write
+
+        Returns:
+            RunnableConfig: The updated config containing the saved checkpoint's
+                timestamp.
+        """
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        blobs = []
+        for k, v in new_versions.items():
+            type_, blob = (
+                self.serde.dumps_typed(values[k]) if k in values else ("empty", b"")
+            )
+            blobs.append((thread_id, checkpoint_ns, k, str(v), type_, blob))
+        type_, serialized_checkpoint = self.serde.dumps_typed(c)
+        serialized_metadata = json.dumps(
+            get_serializable_checkpoint_metadata(config, metadata),
+            ensure_ascii=False,
+            default=_json_default,
+        )
+        with self.cursor() as cur:
+            cur.executemany(
+                "INSERT OR REPLACE INTO blobs "
+                "(thread_id, checkpoint_ns, channel, version, type, blob) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                blobs,
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),  # parent
+                    type_,
+                    serialized_checkpoint,
+                    serialized_metadata,
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save a list of writes to the database.
+
+        Args:
+            config: The config to associate with the writes.
+            writes: The writes to save.
+            task_id: Identifier for the task creating the writes.
+            task_path: Path of the task creating the writes.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # special writes replace earlier ones, regular writes are only saved once
+        query = (
+            "INSERT OR REPLACE INTO writes "
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE INTO writes "
+        ) + (
+            "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, "
+            "type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self.cursor() as cur:
+            cur.executemany(query, rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID.
+
+        Args:
+            thread_id: The thread ID to delete.
+
+        Returns:
+            None
+        """
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            cur.execute("DELETE FROM blobs WHERE thread_id = ?", (thread_id,))
+            cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    async def _arun(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # run in a copy of the current context, like langchain_core's
+        # run_in_executor, so context variables are visible to the serializer
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(ctx.run, func, *args, **kwargs)
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Asynchronous version of `get_tuple`.
+
+        Args:
+            config: The config to use for retrieving the checkpoint.
+
+        Returns:
+            The retrieved checkpoint tuple, or None if no matching checkpoint was found.
+        """
+        return await self._arun(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Asynchronous version of `list`.
+
+        Args:
+            config: The config to use for listing the checkpoints.
+            filter: Additional filtering criteria for metadata.
+            before: List checkpoints created before this configuration.
+            limit: Maximum number of checkpoints to return.
+
+        Yields:
+            An asynchronous iterator of checkpoint tuples.
+        """
+        items = await self._arun(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Asynchronous version of `put`.
+
+        Args:
+            config: The config to associate with the checkpoint.
+            checkpoint: The checkpoint to save.
+            metadata: Additional metadata to save with the checkpoint.
+            new_versions: New versions as of this write
+
+        Returns:
+            RunnableConfig: The updated config containing the saved checkpoint's
+                timestamp.
+        """
+        return await self._arun(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Asynchronous version of `put_writes`.
+
+        Args:
+            config: The config to associate with the writes.
+            writes: The writes to save, each as a (channel, value) pair.
+            task_id: Identifier for the task creating the writes.
+            task_path: Path of the task creating the writes.
+
+        Returns:
+            None
+        """
+        return await self._arun(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID.
+
+        Args:
+            thread_id: The thread ID to delete.
+
+        Returns:
+            None
+        """
+        return await self._arun(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode values `json` can't, e.g. UUIDs, as `JsonPlusSerializer` would
+    export them to JSON. They are read back in that form, e.g. as strings."""
+    value = ormsgpack.unpackb(
+        _msgpack_enc(obj),
+        ext_hook=_msgpack_ext_hook_to_json,
+        option=ormsgpack.OPT_NON_STR_KEYS,
+    )
+    if type(value) is type(obj):
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return value
+
+
+def _json_path(key: str) -> str:
+    return '$."' + key.replace('"', '\\"') + '"'
+
+
+__all__ = ["FileSaver"]
@@ -0,0 +1,893 @@
+from __future__ import annotations
+
+import logging
+import operator
+import os
+import pickle
+import random
+import shutil
+from bisect import bisect_left, insort
+from collections import defaultdict
+from collections.abc import (
+    AsyncIterator,
+    Collection,
+    Iterator,
+    MutableMapping,
+    Sequence,
+)
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, ExitStack
+from types import TracebackType
+from typing import Any, NamedTuple, cast
+
+from langchain_core.runnables import RunnableConfig
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+# Blob type prefix for channel values stored as an append-only delta.
+# The payload is `[base_version, new_items]` serialized with the checkpointer's serde.
+DELTA_PREFIX = "delta:"
+
+
+class InMemorySaver(
+    BaseCheckpointSaver[str], AbstractContextManager, AbstractAsyncContextManager
+):
+    """An in-memory checkpoint saver.
+
+    This checkpoint saver stores checkpoints in memory using a defaultdict.
+
+    Note:
+        Only use `InMemorySaver` for debugging or testing purposes.
+        For production use cases we recommend installing [langgraph-checkpoint-postgres](https://pypi.org/project/langgraph-checkpoint-postgres/) and using `PostgresSaver` / `AsyncPostgresSaver`.
+
+        If you are using LangSmith Deployment, no checkpointer needs to be specified. The correct managed checkpointer will be used automatically.
+
+    Args:
+        serde: The serializer to use for serializing and deserializing checkpoints.
+        delta_channels: Channels whose list values are stored as append-only deltas.
+            When a new value extends the previously stored list for the same thread
+            and namespace, only the appended items are serialized, and the full list
+            is rebuilt on read. A compacted snapshot is written whenever the items
+            appended since the last snapshot outnumber the items in it, so memory
+            grows linearly with the length of the list, and each `put` only
+            serializes the new items. Previously stored items are compared by
+            identity, so channels listed here must not have their
+            items mutated in place once they were returned by a node; such edits
+            would be lost. Defaults to `()`.
+        metadata_index: Metadata keys to index for equality filters in `list`, e.g.
+            `("source", "step", "user_id")`. Filters on indexed keys only visit
+            matching checkpoints instead of deserializing every metadata blob.
+
+    Examples:
+
+            import asyncio
+
+            from langgraph.checkpoint.memory import InMemorySaver
+            from langgraph.graph import StateGraph
+
+            builder = StateGraph(int)
+            builder.add_node("add_one", lambda x: x + 1)
+            builder.set_entry_point("add_one")
+            builder.set_finish_point("add_one")
+
+            memory = InMemorySaver()
+            graph = builder.compile(checkpointer=memory)
+            coro = graph.ainvoke(1, {"configurable": {"thread_id": "thread-1"}})
+            asyncio.run(coro)  # Output: 2
+    """
+
+    # thread ID ->  checkpoint NS -> checkpoint ID -> checkpoint mapping
+    storage: defaultdict[
+        str,
+        dict[str, dict[str, tuple[tuple[str, bytes], tuple[str, bytes], str | None]]],
+    ]
+    # (thread ID, checkpoint NS, checkpoint ID) -> (task ID, write idx)
+    writes: defaultdict[
+        tuple[str, str, str],
+        dict[tuple[str, int], tuple[str, str, tuple[str, bytes], str]],
+    ]
+    blobs: dict[
+        tuple[
+            str, str, str, str | int | float
+        ],  # thread id, checkpoint ns, channel, version
+        tuple[str, bytes],
+    ]
+    # (thread ID, checkpoint NS, channel) -> latest list value stored for delta encoding
+    delta_heads: dict[tuple[str, str, str], _DeltaHead]
+    # (thread ID, checkpoint NS) -> sorted checkpoint IDs and metadata index
+    indexes: dict[tuple[str, str], _CheckpointIndex]
+
+    def __init__(
+        self,
+        *,
+        serde: SerializerProtocol | None = None,
+        factory: type[defaultdict] = defaultdict,
+        delta_channels: Collection[str] = (),
+        metadata_index: Collection[str] = (),
+    ) -> None:
+        super().__init__(serde=serde)
+        self.delta_channels = frozenset(delta_channels)
+        self.delta_heads = {}
+        self.metadata_index = tuple(metadata_index)
+        self.indexes = {}
+        self.storage = factory(lambda: defaultdict(dict))
+        self.writes = factory(dict)
+        self.blobs = factory()
+        self.stack = ExitStack()
+        if factory is not defaultdict:
+            self.stack.enter_context(self.storage)  # type: ignore[arg-type]
+            self.stack.enter_context(self.writes)  # type: ignore[arg-type]
+            self.stack.enter_context(self.blobs)  # type: ignore[arg-type]
+
+    def __enter__(self) -> InMemorySaver:
+        return self.stack.__enter__()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        return self.stack.__exit__(exc_type, exc_value, traceback)
+
+    async def __aenter__(self) -> InMemorySaver:
+        return self.stack.__enter__()
+
+    async def __aexit__(
+        self,
+        __exc_type: type[BaseException] | None,
+        __exc_value: BaseException | None,
+        __traceback: TracebackType | None,
+    ) -> bool | None:
+        return self.stack.__exit__(__exc_type, __exc_value, __traceback)
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        channel_values: dict[str, Any] = {}
+        for k, v in versions.items():
+            kk = (thread_id, checkpoint_ns, k, v)
+            if kk in self.blobs:
+                vv = self.blobs[kk]
+                if vv[0].startswith(DELTA_PREFIX):
+                    channel_values[k] = self._load_delta_blob(kk)
+                elif vv[0] != "empty":
+                    channel_values[k] = self.serde.loads_typed(vv)
+                else:
+                    continue
+                if k in self.delta_channels:
+                    self._track_loaded(kk, channel_values[k])
+        return channel_values
+
+    def _track_loaded(
+        self, key: tuple[str, str, str, str | int | float], value: Any
+    ) -> None:
+        """Compare the next delta against `value`, a freshly loaded copy of the
+        latest stored list, so that a graph resuming from it still appends."""
+        thread_id, checkpoint_ns, channel, version = key
+        head = self.delta_heads.get((thread_id, checkpoint_ns, channel))
+        if (
+            head is not None
+            and head.version == version
+            and isinstance(value, list)
+            and len(value) == len(head.items)
+        ):
+            self.delta_heads[thread_id, checkpoint_ns, channel] = head._replace(
+                items=value.copy()
+            )
+
+    def _load_delta_blob(self, key: tuple[str, str, str, str | int | float]) -> list:
+        """Rebuild a list value by walking its delta chain back to a snapshot."""
+        thread_id, checkpoint_ns, channel, _ = key
+        chunks: list[list] = []
+        vv = self.blobs[key]
+        while vv[0].startswith(DELTA_PREFIX):
+            base_version, items = self.serde.loads_typed(
+                (vv[0][len(DELTA_PREFIX) :], vv[1])
+            )
+            chunks.append(items)
+            vv = self.blobs[(thread_id, checkpoint_ns, channel, base_version)]
+        value = list(self.serde.loads_typed(vv))
+        for items in reversed(chunks):
+            value.extend(items)
+        return value
+
+    def _dump_blob(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str | int | float,
+        value: Any,
+    ) -> tuple[str, bytes]:
+        if channel not in self.delta_channels:
+            return self.serde.dumps_typed(value)
+        head_key = (thread_id, checkpoint_ns, channel)
+        if not isinstance(value, list):
+            self.delta_heads.pop(head_key, None)
+            return self.serde.dumps_typed(value)
+        head = self.delta_heads.get(head_key)
+        # only the new items are serialized, the stored prefix is compared by
+        # identity, which is cheap enough not to matter next to serialization
+        if (
+            head is not None
+            and len(value) > len(head.items)
+            and len(value) - head.snapshot_len <= head.snapshot_len
+            and all(map(operator.is_, head.items, value))
+        ):
+            typ, data = self.serde.dumps_typed([head.version, value[len(head.items) :]])
+            self.delta_heads[head_key] = _DeltaHead(
+                version, value.copy(), head.snapshot_len
+            )
+            return DELTA_PREFIX + typ, data
+        self.delta_heads[head_key] = _DeltaHead(version, value.copy(), len(value))
+        return self.serde.dumps_typed(value)
+
+    def _get_index(self, thread_id: str, checkpoint_ns: str) -> _CheckpointIndex:
+        """Return the checkpoint index for a namespace, rebuilding it if stale."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        index = self.indexes.get((thread_id, checkpoint_ns))
+        if index is None or len(index.ids) != len(checkpoints):
+            index = self.indexes[(thread_id, checkpoint_ns)] = _CheckpointIndex()
+            for checkpoint_id, (_, metadata, _) in checkpoints.items():
+                index.add(
+                    checkpoint_id,
+                    self.serde.loads_typed(metadata) if self.metadata_index else {},
+                    self.metadata_index,
+                )
+        return index
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get a checkpoint tuple from the in-memory storage.
+
+        This method retrieves a checkpoint tuple from the in-memory storage based on the
+        provided config. If the config contains a `checkpoint_id` key, the checkpoint with
+        the matching thread ID and timestamp is retrieved. Otherwise, the latest checkpoint
+        for the given thread ID is retrieved.
+
+        Args:
+            config: The config to use for retrieving the checkpoint.
+
+        Returns:
+            The retrieved checkpoint tuple, or None if no matching checkpoint was found.
+        """
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        if checkpoint_id := get_checkpoint_id(config):
+            if saved := self.storage[thread_id][checkpoint_ns].get(checkpoint_id):
+                checkpoint, metadata, parent_checkpoint_id = saved
+                writes = self.writes[(thread_id, checkpoint_ns, checkpoint_id)].values()
+                checkpoint_: Checkpoint = self.serde.loads_typed(checkpoint)
+                return CheckpointTuple(
+                    config=config,
+                    checkpoint={
+                        **checkpoint_,
+                        "channel_values": self._load_blobs(
+                            thread_id, checkpoint_ns, checkpoint_["channel_versions"]
+                        ),
+                    },
+                    metadata=self.serde.loads_typed(metadata),
+                    pending_writes=[
+                        (id, c, self.serde.loads_typed(v)) for id, c, v, _ in writes
+                    ],
+                    parent_config=(
+                        {
+                            "configurable": {
+                                "thread_id": thread_id,
+                                "checkpoint_ns": checkpoint_ns,
+                                "checkpoint_id": parent_checkpoint_id,
+                            }
+                        }
+                        if parent_checkpoint_id
+                        else None
+                    ),
+                )
+        else:
+            if checkpoints := self.storage[thread_id][checkpoint_ns]:
+                checkpoint_id = self._get_index(thread_id, checkpoint_ns).ids[-1]
+                checkpoint, metadata, parent_checkpoint_id = checkpoints[checkpoint_id]
+                writes = self.writes[(thread_id, checkpoint_ns, checkpoint_id)].values()
+                checkpoint_ = self.serde.loads_typed(checkpoint)
+                return CheckpointTuple(
+                    config={
+                        "configurable": {
+                            "thread_id": thread_id,
+                            "checkpoint_ns": checkpoint_ns,
+                            "checkpoint_id": checkpoint_id,
+                        }
+                    },
+                    checkpoint={
+                        **checkpoint_,
+                        "channel_values": self._load_blobs(
+                            thread_id, checkpoint_ns, checkpoint_["channel_versions"]
+                        ),
+                    },
+                    metadata=self.serde.loads_typed(metadata),
+                    pending_writes=[
+                        (id, c, self.serde.loads_typed(v)) for id, c, v, _ in writes
+                    ],
+                    parent_config=(
+                        {
+                            "configurable": {
+                                "thread_id": thread_id,
+                                "checkpoint_ns": checkpoint_ns,
+                                "checkpoint_id": parent_checkpoint_id,
+                            }
+                        }
+                        if parent_checkpoint_id
+                        else None
+                    ),
+                )
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+        lazy: bool = False,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints from the in-memory storage.
+
+        This method retrieves a list of checkpoint tuples from the in-memory storage based
+        on the provided criteria.
+
+        Args:
+            config: Base configuration for filtering checkpoints.
+            filter: Additional filtering criteria for metadata.
+            before: List checkpoints created before this configuration.
+            limit: Maximum number of checkpoints to return.
+            lazy: Return `channel_values` as a `LazyChannelValues` mapping that only
+                deserializes channels when they are accessed, for callers that
+                mostly need configs or metadata. It is not a `dict`, so convert it
+                with `.copy()` before serializing the checkpoint.
+
+        Yields:
+            An iterator of matching checkpoint tuples.
+        """
+        thread_ids = (config["configurable"]["thread_id"],) if config else self.storage
+        config_checkpoint_ns = (
+            config["configurable"].get("checkpoint_ns") if config else None
+        )
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+        # pick the indexed filter keys, if any, to narrow down candidates
+        indexed_filter = [
+            (key, value)
+            for key, value in (filter or {}).items()
+            if key in self.metadata_index and _is_hashable(value)
+        ]
+        for thread_id in thread_ids:
+            for checkpoint_ns in list(self.storage[thread_id].keys()):
+                if (
+                    config_checkpoint_ns is not None
+                    and checkpoint_ns != config_checkpoint_ns
+                ):
+                    continue
+
+                checkpoints = self.storage[thread_id][checkpoint_ns]
+                if config_checkpoint_id:
+                    # filter by checkpoint ID from config
+                    candidates = (
+                        [config_checkpoint_id]
+                        if config_checkpoint_id in checkpoints
+                        else []
+                    )
+                else:
+                    index = self._get_index(thread_id, checkpoint_ns)
+                    candidates = min(
+                        (index.metadata.get(item, []) for item in indexed_filter),
+                        key=len,
+                        default=index.ids,
+                    )
+
+                # filter by checkpoint ID from `before` config
+                end = (
+                    bisect_left(candidates, before_checkpoint_id)
+                    if before_checkpoint_id
+                    else len(candidates)
+                )
+                for i in range(end - 1, -1, -1):
+                    checkpoint_id = candidates[i]
+                    checkpoint, metadata_b, parent_checkpoint_id = checkpoints[
+                        checkpoint_id
+                    ]
+
+                    # filter by metadata
+                    metadata = self.serde.loads_typed(metadata_b)
+                    if filter and not all(
+                        query_value == metadata.get(query_key)
+                        for query_key, query_value in filter.items()
+                    ):
+                        continue
+
+                    # limit search results
+                    if limit is not None and limit <= 0:
+                        return
+                    elif limit is not None:
+                        limit -= 1
+
+                    writes = self.writes[
+                        (thread_id, checkpoint_ns, checkpoint_id)
+                    ].values()
+
+                    checkpoint_: Checkpoint = self.serde.loads_typed(checkpoint)
+
+                    yield CheckpointTuple(
+                        config={
+                            "configurable": {
+                                "thread_id": thread_id,
+                                "checkpoint_ns": checkpoint_ns,
+                                "checkpoint_id": checkpoint_id,
+                            }
+                        },
+                        checkpoint={
+                            **checkpoint_,
+                            "channel_values": (
+                                cast(
+                                    dict[str, Any],
+                                    LazyChannelValues(
+                                        self,
+                                        thread_id,
+                                        checkpoint_ns,
+                                        checkpoint_["channel_versions"],
+                                    ),
+                                )
+                                if lazy
+                                else self._load_blobs(
+                                    thread_id,
+                                    checkpoint_ns,
+                                    checkpoint_["channel_versions"],
+                                )
+                            ),
+                        },
+                        metadata=metadata,
+                        parent_config=(
+                            {
+                                "configurable": {
+                                    "thread_id": thread_id,
+                                    "checkpoint_ns": checkpoint_ns,
+                                    "checkpoint_id": parent_checkpoint_id,
+                                }
+                            }
+                            if parent_checkpoint_id
+                            else None
+                        ),
+                        pending_writes=[
+                            (id, c, self.serde.loads_typed(v)) for id, c, v, _ in writes
+                        ],
+                    )
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint to the in-memory storage.
+
+        This method saves a checkpoint to the in-memory storage. The checkpoint is associated
+        with the provided config.
+
+        Args:
+            config: The config to associate with the checkpoint.
+            checkpoint: The checkpoint to save.
+            metadata: Additional metadata to save with the checkpoint.
+            new_versions: New versions as of this write
+
+        Returns:
+            RunnableConfig: The updated config containing the saved checkpoint's timestamp.
+        """
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        for k, v in new_versions.items():
+            if k in values:
+                self.blobs[(thread_id, checkpoint_ns, k, v)] = self._dump_blob(
+                    thread_id, checkpoint_ns, k, v, values[k]
+                )
+            else:
+                self.delta_heads.pop((thread_id, checkpoint_ns, k), None)
+                self.blobs[(thread_id, checkpoint_ns, k, v)] = ("empty", b"")
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        index = self.indexes.get((thread_id, checkpoint_ns))
+        if index is not None and (
+            checkpoint["id"] in checkpoints or len(index.ids) != len(checkpoints)
+        ):
+            # overwritten or externally modified, rebuild on next read
+            del self.indexes[(thread_id, checkpoint_ns)]
+            index = None
+        metadata_ = get_checkpoint_metadata(config, metadata)
+        checkpoints.update(
+            {
+                checkpoint["id"]: (
+                    self.serde.dumps_typed(c),
+                    self.serde.dumps_typed(metadata_),
+                    config["configurable"].get("checkpoint_id"),  # parent
+                )
+            }
+        )
+        if index is not None:
+            index.add(checkpoint["id"], metadata_, self.metadata_index)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save a list of writes to the in-memory storage.
+
+        This method saves a list of writes to the in-memory storage. The writes are associated
+        with the provided config.
+
+        Args:
+            config: The config to associate with the writes.
+            writes: The writes to save.
+            task_id: Identifier for the task creating the writes.
+            task_path: Path of the task creating the writes.
+
+        Returns:
+            RunnableConfig: The updated config containing the saved writes' timestamp.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        outer_key = (thread_id, checkpoint_ns, checkpoint_id)
+        outer_writes_ = self.writes.get(outer_key)
+        for idx, (c, v) in enumerate(writes):
+            inner_key = (task_id, WRITES_IDX_MAP.get(c, idx))
+            if inner_key[1] >= 0 and outer_writes_ and inner_key in outer_writes_:
+                continue
+
+            self.writes[outer_key][inner_key] = (
+                task_id,
+                c,
+                self.serde.dumps_typed(v),
+                task_path,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID.
+
+        Args:
+            thread_id: The thread ID to delete.
+
+        Returns:
+            None
+        """
+        if thread_id in self.storage:
+            del self.storage[thread_id]
+        for k in list(self.writes.keys()):
+            if k[0] == thread_id:
+                del self.writes[k]
+        for k in list(self.blobs.keys()):
+            if k[0] == thread_id:
+                del self.blobs[k]
+        for head_key in list(self.delta_heads.keys()):
+            if head_key[0] == thread_id:
+                del self.delta_heads[head_key]
+        for index_key in list(self.indexes.keys()):
+            if index_key[0] == thread_id:
+                del self.indexes[index_key]
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Asynchronous version of `get_tuple`.
+
+        This method is an asynchronous wrapper around `get_tuple` that runs the synchronous
+        method in a separate thread using asyncio.
+
+        Args:
+            config: The config to use for retrieving the checkpoint.
+
+        Returns:
+            The retrieved checkpoint tuple, or None if no matching checkpoint was found.
+        """
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+        lazy: bool = False,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Asynchronous version of `list`.
+
+        This method is an asynchronous wrapper around `list` that runs the synchronous
+        method in a separate thread using asyncio.
+
+        Args:
+            config: The config to use for listing the checkpoints.
+
+        Yields:
+            An asynchronous iterator of checkpoint tuples.
+        """
+        for item in self.list(
+            config, filter=filter, before=before, limit=limit, lazy=lazy
+        ):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Asynchronous version of `put`.
+
+        Args:
+            config: The config to associate with the checkpoint.
+            checkpoint: The checkpoint to save.
+            metadata: Additional metadata to save with the checkpoint.
+            new_versions: New versions as of this write
+
+        Returns:
+            RunnableConfig: The updated config containing the saved checkpoint's timestamp.
+        """
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Asynchronous version of `put_writes`.
+
+        This method is an asynchronous wrapper around `put_writes` that runs the synchronous
+        method in a separate thread using asyncio.
+
+        Args:
+            config: The config to associate with the writes.
+            writes: The writes to save, each as a (channel, value) pair.
+            task_id: Identifier for the task creating the writes.
+            task_path: Path of the task creating the writes.
+
+        Returns:
+            None
+        """
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID.
+
+        Args:
+            thread_id: The thread ID to delete.
+
+        Returns:
+            None
+        """
+        return self.delete_thread(thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+
+MemorySaver = InMemorySaver  # Kept for backwards compatibility
+
+
+class LazyChannelValues(MutableMapping[str, Any]):
+    """Channel values of a checkpoint, deserialized on first access.
+
+    Returned by `InMemorySaver.list(..., lazy=True)` so that callers only
+    interested in configs or metadata don't pay for deserializing every channel.
+    """
+
+    __slots__ = ("_saver", "_thread_id", "_checkpoint_ns", "_versions", "_values")
+
+    def __init__(
+        self,
+        saver: InMemorySaver,
+        thread_id: str,
+        checkpoint_ns: str,
+        versions: ChannelVersions,
+    ) -> None:
+        self._saver = saver
+        self._thread_id = thread_id
+        self._checkpoint_ns = checkpoint_ns
+        # channel -> version, for channels not yet deserialized
+        self._versions = {
+            k: v
+            for k, v in versions.items()
+            if (blob := saver.blobs.get((thread_id, checkpoint_ns, k, v)))
+            and blob[0] != "empty"
+        }
+        self._values: dict[str, Any] = {}
+
+    def _load(self, key: str) -> None:
+        version = self._versions.pop(key)
+        self._values[key] = self._saver._load_blobs(
+            self._thread_id, self._checkpoint_ns, {key: version}
+        )[key]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._versions:
+            self._load(key)
+        return self._values[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._versions.pop(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if self._versions.pop(key, None) is None:
+            del self._values[key]
+        else:
+            self._values.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._versions or key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._values)
+        yield from list(self._versions)
+
+    def __len__(self) -> int:
+        return len(self._versions) + len(self._values)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+    def copy(self) -> dict[str, Any]:
+        return {k: self[k] for k in list(self)}
+
+
+class _CheckpointIndex:
+    """Sorted checkpoint IDs for a thread and namespace, plus metadata postings."""
+
+    __slots__ = ("ids", "metadata")
+
+    def __init__(self) -> None:
+        self.ids: list[str] = []
+        # (metadata key, value) -> sorted checkpoint IDs
+        self.metadata: dict[tuple[str, Any], list[str]] = {}
+
+    def add(
+        self, checkpoint_id: str, metadata: CheckpointMetadata, keys: Sequence[str]
+    ) -> None:
+        _insert_sorted(self.ids, checkpoint_id)
+        for key in keys:
+            # missing keys are indexed as None, as `list` filters treat them
+            value = metadata.get(key)
+            if _is_hashable(value):
+                _insert_sorted(
+                    self.metadata.setdefault((key, value), []), checkpoint_id
+                )
+
+
+def _insert_sorted(ids: list[str], checkpoint_id: str) -> None:
+    # checkpoint IDs are monotonically increasing, so this is almost always an append
+    if not ids or ids[-1] < checkpoint_id:
+        ids.append(checkpoint_id)
+    else:
+        insort(ids, checkpoint_id)
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class _DeltaHead(NamedTuple):
+    """Latest list value stored for a delta-encoded channel."""
+
+    version: str | int | float
+    """Channel version the value was stored under."""
+    items: list
+    """Shallow copy of the stored list, used to detect append-only updates.
+
+    Items are compared by identity, so items edited in place after they were
+    stored are not detected."""
+    snapshot_len: int
+    """Length of the list at the most recent full snapshot in the chain."""
+
+
+class PersistentDict(defaultdict):
+    """Persistent dictionary with an API compatible with shelve and anydbm.
+
+    The dict is kept in memory, so the dictionary operations run as fast as
+    a regular dictionary.
+
+    Write to disk is delayed until close or sync (similar to gdbm's fast mode).
+
+    Input file format is automatically discovered.
+    Output file format is selectable between pickle, json, and csv.
+    All three serialization formats are backed by fast C implementations.
+
+    Adapted from https://code.activestate.com/recipes/576642-persistent-dict-with-multiple-standard-file-format/
+
+    """
+
+    def __init__(self, *args: Any, filename: str, **kwds: Any) -> None:
+        self.flag = "c"  # r=readonly, c=create, or n=new
+        self.mode = None  # None or an octal triple like 0644
+        self.format = "pickle"  # 'csv', 'json', or 'pickle'
+        self.filename = filename
+        super().__init__(*args, **kwds)
+
+    def sync(self) -> None:
+        "Write dict to disk"
+        if self.flag == "r":
+            return
+        tempname = self.filename + ".tmp"
+        fileobj = open(tempname, "wb" if self.format == "pickle" else "w")
+        try:
+            self.dump(fileobj)
+        except Exception:
+            os.remove(tempname)
+            raise
+        finally:
+            fileobj.close()
+        shutil.move(tempname, self.filename)  # atomic commit
+        if self.mode is not None:
+            os.chmod(self.filename, self.mode)
+
+    def close(self) -> None:
+        self.sync()
+        self.clear()
+
+    def __enter__(self) -> PersistentDict:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def dump(self, fileobj: Any) -> None:
+        if self.format == "pickle":
+            pickle.dump(dict(self), fileobj, 2)
+        else:
+            raise NotImplementedError("Unknown format: " + repr(self.format))
+
+    def load(self) -> None:
+        # try formats from most restrictive to least restrictive
+        if self.flag == "n":
+            return
+        with open(self.filename, "rb" if self.format == "pickle" else "r") as fileobj:
+            for loader in (pickle.load,):
+                fileobj.seek(0)
+                try:
+                    return self.update(loader(fileobj))
+                except EOFError:
+                    return
+                except Exception:
+                    logger.error(f"Failed to load file: {fileobj.name}")
+                    raise
+            raise ValueError("File not in a supported format")